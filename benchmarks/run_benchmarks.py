@@ -0,0 +1,308 @@
+"""Benchmarks of the Amiet pipeline on synthetic data.
+
+Every stage of the pipeline is timed and its peak memory is measured over a
+grid of problem sizes:
+
+- the data stages (``load``, ``spectrum``, ``coherence`` and ``welch``) over
+  the number of time steps and of sensors;
+- the acoustic stages (``radiation_integral`` and ``psd``) over the number of
+  frequencies and of observers, with ``radiation_unfused``, the term by term
+  evaluation of the radiation integral, as a reference for the time and
+  memory of the fused one.
+
+The results are saved as JSON and compared against a baseline, e.g.:
+
+.. code-block:: bash
+
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --n-time 65536 --n-sensors 128 --repeat 5
+
+The wall time is the best of ``--repeat`` runs; the peak memory is the largest
+amount of memory allocated through Python and numpy during one extra run,
+measured with :mod:`tracemalloc` (so that the timings are not slowed down by
+the tracing).
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+import amiet_self_noise as asn
+
+from synthetic import observers, write_case
+
+DATA_STAGES = ("load", "spectrum", "coherence", "welch")
+ACOUSTIC_STAGES = ("radiation_integral", "radiation_unfused", "psd")
+
+
+def measure(function, repeat: int = 3) -> dict:
+    """Return the best wall time (s) and the peak memory (bytes) of a call."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time": min(times), "peak_memory": peak}
+
+
+def data_stages(config_path: str, n_sensors: int) -> dict:
+    """Return the data stages of a case, as functions without arguments."""
+    input_data = asn.io_utils.InputData(config_path)
+    pressure, fs = input_data.pressure, input_data.fs
+    nperseg = input_data.n_time_steps // 8
+    flims = (fs / 100, fs / 4)
+    return {
+        "load": lambda: asn.io_utils.InputData(config_path),
+        "spectrum": lambda: asn.preproc.spectrum(
+            pressure, filter=True, flims=flims, fs=fs, avg=0, nperseg=nperseg
+        ),
+        "coherence": lambda: asn.preproc.coherence_function(
+            pressure, ref_index=n_sensors // 2, fs=fs, nperseg=nperseg
+        ),
+        "welch": lambda: asn.amiet_model.AmietModel(input_data).compute_spectra(),
+    }
+
+
+def acoustic_stages(config, n_freq: int, n_obs: int) -> dict:
+    """Return the acoustic stages for a frequency and observer grid."""
+    f = np.linspace(10.0, 20_000.0, n_freq)
+    obs = observers(n_obs)
+    beta2 = 1 - config.M0**2
+    S0 = np.sqrt(obs[:, 0] ** 2 + beta2 * (obs[:, 1] ** 2 + obs[:, 2] ** 2))
+    phi_pp = 1e-3 / (1.0 + (f / 1000.0) ** 2)
+    ly = 0.01 / (1.0 + f / 1000.0)
+    ri = asn.radiation_integral
+    kernel = ri.compute_frequency_kernel(
+        2 * np.pi * f,
+        config.U0,
+        config.c0,
+        config.M0,
+        config.b,
+        alpha=config.alpha,
+        fresnel_tol=config.fresnel_tol,
+    )
+    return {
+        "radiation_integral": lambda: ri.compute_radiation_integral(
+            2 * np.pi * f,
+            config.U0,
+            config.c0,
+            obs[:, 0],
+            S0,
+            config.M0,
+            config.b,
+            alpha=config.alpha,
+            fresnel_tol=config.fresnel_tol,
+        ),
+        "radiation_unfused": lambda: ri.evaluate_radiation_integral(
+            kernel, obs[:, 0], S0, fused=False
+        ),
+        "psd": lambda: asn.amiet_model.far_field_psd(f, phi_pp, ly, obs, config),
+    }
+
+
+def run(args) -> list:
+    """Run the benchmarks over the grid given on the command line."""
+    results = []
+    stages = set(args.stages)
+    with tempfile.TemporaryDirectory() as directory:
+        if stages & set(DATA_STAGES):
+            for n_time, n_sensors in itertools.product(args.n_time, args.n_sensors):
+                case_dir = os.path.join(directory, f"{n_time}_{n_sensors}")
+                config_path = write_case(case_dir, n_time, n_sensors)
+                functions = data_stages(config_path, n_sensors)
+                for stage in DATA_STAGES:
+                    if stage in stages:
+                        params = {"n_time": n_time, "n_sensors": n_sensors}
+                        results.append(
+                            _record(stage, params, functions[stage], args.repeat)
+                        )
+
+    config = asn.io_utils.ConfigData(
+        b=0.0678,
+        T=293.0,
+        L=1.0,
+        rho=1.225,
+        obs=observers(1),
+        U0=16.0,
+        data_type="dns",
+        fresnel_tol=args.fresnel_tol,
+    )
+    for n_freq, n_obs in itertools.product(args.n_freq, args.n_obs):
+        functions = acoustic_stages(config, n_freq, n_obs)
+        for stage in ACOUSTIC_STAGES:
+            if stage in stages:
+                params = {"n_freq": n_freq, "n_obs": n_obs}
+                results.append(_record(stage, params, functions[stage], args.repeat))
+    return results
+
+
+def _record(stage, params, function, repeat):
+    result = {"stage": stage, "params": params, **measure(function, repeat)}
+    print(
+        f"{stage:>20s} {json.dumps(params):40s} "
+        f"{result['time'] * 1e3:10.2f} ms {result['peak_memory'] / 2**20:10.2f} MiB"
+    )
+    return result
+
+
+def _key(result):
+    return result["stage"], tuple(sorted(result["params"].items()))
+
+
+def compare(
+    results: list, baseline: list, threshold: float, min_time: float = 1e-3
+) -> list:
+    """Compare the results with a baseline.
+
+    Returns the comparisons of the benchmarks, as dicts with the time and
+    memory ratios (current / baseline) and a ``regression`` flag, set when
+    either ratio exceeds ``1 + threshold``. Stages faster than ``min_time``
+    seconds are too noisy for their time ratio to be flagged. Benchmarks with
+    no baseline entry (e.g. a new stage) have no ratios and a ``missing``
+    flag, so that they are reported instead of silently left out.
+    """
+    reference = {_key(result): result for result in baseline}
+    comparisons = []
+    for result in results:
+        if _key(result) not in reference:
+            comparisons.append(
+                {
+                    "stage": result["stage"],
+                    "params": result["params"],
+                    "time_ratio": None,
+                    "memory_ratio": None,
+                    "regression": False,
+                    "missing": True,
+                }
+            )
+            continue
+        base = reference[_key(result)]
+        time_ratio = result["time"] / base["time"]
+        memory_ratio = result["peak_memory"] / max(base["peak_memory"], 1)
+        slower = time_ratio > 1 + threshold and result["time"] > min_time
+        comparisons.append(
+            {
+                "stage": result["stage"],
+                "params": result["params"],
+                "time_ratio": time_ratio,
+                "memory_ratio": memory_ratio,
+                "regression": slower or memory_ratio > 1 + threshold,
+                "missing": False,
+            }
+        )
+    return comparisons
+
+
+def print_comparison(comparisons: list, console: Console = None) -> None:
+    """Print the comparison with the baseline as a table."""
+    if console is None:
+        console = Console()
+    table = Table(title="Comparison with the baseline")
+    for column in ("Stage", "Parameters", "Time ratio", "Memory ratio", "Status"):
+        table.add_column(column)
+    for comparison in comparisons:
+        if comparison["missing"]:
+            status = "[yellow]no baseline"
+        elif comparison["regression"]:
+            status = "[red]regression"
+        else:
+            status = "[green]ok"
+        table.add_row(
+            comparison["stage"],
+            ", ".join(f"{k}={v}" for k, v in comparison["params"].items()),
+            *(
+                "-" if ratio is None else f"{ratio:.2f}"
+                for ratio in (comparison["time_ratio"], comparison["memory_ratio"])
+            ),
+            status,
+        )
+    console.print(table)
+    n_missing = sum(comparison["missing"] for comparison in comparisons)
+    if n_missing:
+        console.print(
+            f"[yellow]{n_missing} benchmark(s) not in the baseline: regenerate it "
+            "with --output baseline.json[/yellow]"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n-time", type=int, nargs="+", default=[8192, 32768])
+    parser.add_argument("--n-sensors", type=int, nargs="+", default=[16, 64])
+    parser.add_argument("--n-freq", type=int, nargs="+", default=[256, 1024])
+    parser.add_argument("--n-obs", type=int, nargs="+", default=[1, 64])
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        default=DATA_STAGES + ACOUSTIC_STAGES,
+        choices=DATA_STAGES + ACOUSTIC_STAGES,
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage")
+    parser.add_argument(
+        "--fresnel-tol",
+        type=float,
+        default=None,
+        help="tolerance of the tabulated Fresnel integrals (default: exact)",
+    )
+    parser.add_argument(
+        "--output", default="benchmark_results.json", help="JSON file of the results"
+    )
+    parser.add_argument("--baseline", help="JSON file of the baseline results")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="relative slowdown or memory increase reported as a regression",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=1e-3,
+        help="stages faster than this (s) are not checked for slowdowns",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "metadata": {
+                    "python": sys.version.split()[0],
+                    "numpy": np.__version__,
+                    "platform": platform.platform(),
+                    "processor": platform.processor(),
+                    "cpu_count": os.cpu_count(),
+                },
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    comparisons = compare(results, baseline, args.threshold, args.min_time)
+    print_comparison(comparisons)
+    return 1 if any(comparison["regression"] for comparison in comparisons) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Synthetic DNS cases for the benchmarks.
+
+The files have the same layout as the DNS data read by
+:class:`amiet_self_noise.io_utils.InputData`: a mesh file with the ``x``, ``y``
+and ``z`` coordinates, and a pressure file with the ``pressure`` dataset of
+shape (n_time, nx, ny) and the time step ``T_s``.
+"""
+
+import os
+
+import h5py
+import yaml
+
+import numpy as np
+
+
+def write_case(
+    directory: str,
+    n_time: int,
+    n_sensors: int,
+    seed: int = 0,
+    chunk_time: int = 1024,
+    **config,
+) -> str:
+    """Write a synthetic DNS case with ``n_sensors`` spanwise probes.
+
+    The pressure is a common signal plus independent noise on every probe, so
+    that the coherence decays with the spanwise separation like in a turbulent
+    boundary layer. The data is generated and written in blocks of time steps,
+    so that large cases do not need to fit in memory.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the case. It is created if needed.
+    n_time : int
+        The number of time steps.
+    n_sensors : int
+        The number of spanwise probes, all at the same chordwise position.
+    seed : int, optional
+        The seed of the random generator. Default is 0.
+    chunk_time : int, optional
+        The number of time steps of the HDF5 chunks. Default is 1024.
+    **config : dict, optional
+        Entries of the configuration file overriding the defaults.
+
+    Returns
+    -------
+    config_path : str
+        The path to the YAML configuration file of the case.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    z = np.linspace(0.0, 0.2, n_sensors)[None, :]
+    mesh_path = os.path.join(directory, "grid.h5")
+    with h5py.File(mesh_path, "w") as f:
+        f.create_dataset("x", data=np.full_like(z, 0.5))
+        f.create_dataset("y", data=np.zeros_like(z))
+        f.create_dataset("z", data=z)
+
+    data_path = os.path.join(directory, "pressure.h5")
+    with h5py.File(data_path, "w") as f:
+        pressure = f.create_dataset(
+            "pressure",
+            shape=(n_time, 1, n_sensors),
+            dtype=np.float64,
+            chunks=(min(chunk_time, n_time), 1, n_sensors),
+        )
+        for start in range(0, n_time, chunk_time):
+            n = min(chunk_time, n_time - start)
+            common = rng.normal(0.0, 1.0, (n, 1, 1))
+            block = common + 0.5 * rng.normal(0.0, 1.0, (n, 1, n_sensors))
+            pressure[start : start + n] = block
+        f.create_dataset("T_s", data=0.01)
+
+    case = {
+        "b": 0.0678,
+        "T": 293.0,
+        "L": 1.0,
+        "U0": 16.0,
+        "rho": 1.225,
+        "obs": [[0.0, 0.0, 1.21]],
+        "data_type": "dns",
+        "data_path": data_path,
+        "mesh_path": mesh_path,
+        "out_dir": directory,
+        "xprobes": 0,
+        "yprobes": None,
+    }
+    case.update(config)
+    config_path = os.path.join(directory, "config.yaml")
+    with open(config_path, "w") as f:
+        yaml.dump(case, f)
+    return config_path
+
+
+def observers(n_obs: int, radius: float = 1.21) -> np.ndarray:
+    """Return ``n_obs`` observers on a half circle above the trailing edge,
+    shape (n_obs, 3)."""
+    theta = np.linspace(0.05, np.pi - 0.05, n_obs)
+    return np.stack(
+        [radius * np.cos(theta), np.zeros(n_obs), radius * np.sin(theta)], axis=-1
+    )
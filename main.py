@@ -16,6 +16,17 @@ def main():
     f, psd = model.compute_psd()
 
     f, phi_pp = model.compute_wps()
+    _, ly = model.compute_coherence()
+    # Save the spectra, to be read back with asn.io_utils.read_results
+    asn.io_utils.write_results(
+        osp.join(input_data.config.out_dir, "results.h5"),
+        f,
+        psd,
+        input_data.config,
+        phi_pp=phi_pp,
+        ly=ly,
+        radiation=model.radiation,
+    )
 
     p_ref = 2e-5  # Reference pressure in Pa
     fig, ax = plt.subplots()
@@ -0,0 +1,5 @@
+import amiet_self_noise as asn
+
+
+if __name__ == "__main__":
+    raise SystemExit(asn.batch.main())
@@ -1,4 +1,10 @@
 from . import preproc as preproc
+from . import cache as cache
 from . import io_utils as io_utils
 from . import radiation_integral as radiation_integral
 from . import amiet_model as amiet_model
+from . import sweep as sweep
+from . import batch as batch
+from . import profiling as profiling
+from . import online as online
+from . import watch as watch
@@ -1,6 +1,12 @@
+import os
+
 import numpy as np
+from scipy.interpolate import CubicSpline
 
 import amiet_self_noise.preproc as preproc
+from amiet_self_noise import profiling
+from amiet_self_noise.cache import SpectraCache
+from amiet_self_noise.io_utils import data_files
 import amiet_self_noise.radiation_integral as ri
 
 
@@ -18,12 +24,28 @@ class AmietModel:
     input_data : object
         Input data object containing pressure measurements, positions,
         sampling frequency, and configuration parameters.
+    n_workers : int, optional
+        Number of threads used to Fourier transform the sensors in
+        :meth:`compute_spectra`. Default is None (one thread).
         
     Attributes
     ----------
     input_data : object
         Stored input data object containing all necessary parameters
         and measurements for the Amiet model computation.
+    spectra : CrossSpectra or None
+        The Welch spectra of all the sensors, see :meth:`compute_spectra`.
+    kernel : FrequencyKernel or None
+        The observer-independent terms of the radiation integral for the last
+        frequency array, see :meth:`frequency_kernel`.
+    cache : SpectraCache or None
+        The on-disk cache of the spectra, if enabled by ``config.cache``.
+    psd : ndarray or None
+        The PSD of the observers of the configuration, shape (n_freq, n_obs),
+        see :meth:`compute_psd` and :meth:`add_observers`.
+    radiation : ndarray or None
+        The squared modulus of the radiation integral :math:`|I|^2` evaluated
+        with :attr:`psd`, on the same frequencies, shape (n_freq, n_obs).
         
         
     .. note::
@@ -41,16 +63,51 @@ class AmietModel:
     def __init__(
         self,
         input_data,
+        n_workers: int | None = None,
     ):
         self.input_data = input_data
+        self.n_workers = n_workers
+        self.spectra = None
+        self.kernel = None
+        self.psd = None
+        self.radiation = None
+        self._statistics = None
+        self._psd_options = {}
+        config = input_data.config
+        if config.cache and config.out_dir is not None:
+            self.cache = SpectraCache(
+                os.path.join(config.out_dir, "cache"),
+                max_size=int(config.cache_size * 1024**2),
+            )
+        else:
+            self.cache = None
 
-    def compute_psd(self):
+    @profiling.instrument()
+    def compute_psd(
+        self,
+        chunk_size: int | None = 128,
+        f_band: tuple | None = None,
+        n_points: int | None = None,
+    ):
         """
         Compute the power spectral density of radiated noise.
         
         This method calculates the complete power spectral density by 
         combining the wall pressure spectrum, coherence length, and 
         radiation integral with appropriate directivity corrections.
+
+        Parameters
+        ----------
+        chunk_size : int, optional
+            Maximum number of observers evaluated in a single broadcasted
+            pass, see :meth:`evaluate_psd`. Default is 128.
+        f_band : tuple, optional
+            Frequency band (f_min, f_max) in Hz. Only the Welch bins in the
+            band are evaluated and returned. Default is None (all the bins).
+        n_points : int, optional
+            If given, the radiation integral is only evaluated on a
+            logarithmic grid of ``n_points`` frequencies and interpolated,
+            see :meth:`evaluate_at`. Default is None (evaluated at every bin).
         
         Returns
         -------
@@ -72,32 +129,451 @@ class AmietModel:
             :math:`\Phi_{pp}` is the wall pressure spectrum, :math:`\ell_y` is the coherence length,
             and :math:`I` is the radiation integral.
 
+            The result is also kept in :attr:`psd`, so that observers can be
+            added later with :meth:`add_observers` (evaluated on the same
+            frequencies), and :math:`|I|^2` in :attr:`radiation`.
+
         """
-        f, phi_pp = self.compute_wps()
-        _, ly = self.compute_coherence()
+        self._psd_options = dict(f_band=f_band, n_points=n_points)
+        f, self.psd, self.radiation = self._evaluate(
+            self.input_data.config.obs, chunk_size, **self._psd_options
+        )
+        return f, self.psd
+
+    def statistics(self):
+        """
+        Return the observer-independent wall-pressure statistics.
+
+        They are computed once, by :meth:`compute_wps` and
+        :meth:`compute_coherence`, and reused by every later evaluation.
+
+        Returns
+        -------
+        f : ndarray
+            Frequency array in Hz, shape (n_freq,).
+        phi_pp : ndarray
+            Wall pressure spectrum in Pa²·s, shape (n_freq,).
+        ly : ndarray
+            Spanwise coherence length in meters, shape (n_freq,).
+        """
+        if self._statistics is None:
+            f, phi_pp = self.compute_wps()
+            _, ly = self.compute_coherence()
+            self._statistics = (f, phi_pp, ly)
+        return self._statistics
+
+    def evaluate_at(
+        self,
+        obs,
+        chunk_size: int | None = 128,
+        f_band: tuple | None = None,
+        n_points: int | None = None,
+    ):
+        """
+        Evaluate the far-field PSD at arbitrary observers.
+
+        Only the observer-dependent terms are computed: the statistics
+        (:meth:`statistics`) and the frequency kernel
+        (:meth:`frequency_kernel`) are computed on the first call and reused,
+        so that later calls do not read the data again.
+
+        Parameters
+        ----------
+        obs : array_like
+            Observer positions [x, y, z] in meters, shape (n_obs, 3).
+        chunk_size : int, optional
+            Maximum number of observers evaluated in a single broadcasted
+            pass, see :meth:`evaluate_psd`. Default is 128.
+        f_band : tuple, optional
+            Frequency band (f_min, f_max) in Hz. Only the Welch bins in the
+            band are evaluated and returned. Default is None (all the bins).
+        n_points : int, optional
+            If given, the acoustic transfer (see :func:`far_field_transfer`)
+            is evaluated on ``n_points`` logarithmically spaced frequencies
+            spanning the bins, refined at high frequency to resolve the chord
+            interference (see the note below), and interpolated onto the bins
+            by a log-log cubic spline, where it multiplies the source term
+            built from :math:`\\Phi_{pp}` and :math:`\\ell_y`. Default is
+            None (evaluated at every bin).
+
+        Returns
+        -------
+        f : ndarray
+            Frequency array in Hz, shape (n_freq,).
+        psd : ndarray
+            Power spectral density in Pa²/Hz, shape (n_freq, n_obs).
+
+
+        .. note::
+
+            The radiation integral is the most expensive term, and it only
+            varies smoothly with the frequency, whereas :math:`\\Phi_{pp}` and
+            :math:`\\ell_y` are noisy estimates. Interpolating the transfer
+            rather than the statistics keeps all the Welch bins, so that the
+            spectra (and the band levels of :meth:`compute_band_psd`) keep
+            their averaging, while the radiation integral is evaluated at a
+            few hundred frequencies instead of thousands of bins.
+
+            The transfer oscillates with a period of about
+            :math:`c_0 / (2b (1 + x_1/S_0))` Hz, from the interference between
+            the leading and trailing edges. The spacing of the grid is capped
+            to an eighth of the shortest period, :math:`c_0 (1 - M) / (4b)`, so
+            that it is resolved whatever ``n_points``. At low frequencies, the
+            accuracy is set by ``n_points``: about 1% with 100 points over
+            two decades, for observers in the wake of the trailing edge.
 
-        psd = np.zeros([len(f), self.input_data.config.n_obs])
-        for i, observer in enumerate(self.input_data.config.obs):
-            I = np.abs(self.compute_radiation_integral(f, observer)) ** 2
-            beta2 = 1 - self.input_data.config.M0**2
-            S02 = observer[0] ** 2 + beta2 * (observer[1] ** 2 + observer[2] ** 2)
-            directivity = (
-                observer[2]
-                * f
-                * self.input_data.config.b
-                / self.input_data.config.c0
-                / S02
-            ) ** 2
-            psd[:, i] = directivity * 2 * self.input_data.config.L * phi_pp * ly * I
+        Examples
+        --------
 
+        .. code-block:: python
+
+            theta = np.linspace(0, np.pi, 181)
+            arc = np.stack([np.cos(theta), 0 * theta, np.sin(theta)], axis=-1)
+            f, psd = model.evaluate_at(1.2 * arc)  # directivity at 1.2 m
+            f, psd = model.evaluate_at(arc, f_band=(100, 20e3), n_points=200)
+        """
+        f, psd, _ = self._evaluate(obs, chunk_size, f_band, n_points)
         return f, psd
 
+    def _evaluate(self, obs, chunk_size, f_band, n_points):
+        # The frequencies, the PSD and |I|^2 of evaluate_at
+        obs = np.atleast_2d(np.asarray(obs, dtype=float))
+        f, phi_pp, ly = self.statistics()
+        if f_band is not None:
+            in_band = (f >= f_band[0]) & (f <= f_band[1])
+            f, phi_pp, ly = f[in_band], phi_pp[in_band], ly[in_band]
+        if n_points is not None and n_points < 2:
+            raise ValueError(f"n_points must be at least 2, got {n_points}.")
+        positive = f > 0
+        n_positive = np.count_nonzero(positive)
+        grid = None
+        if n_points is not None and n_positive > n_points:
+            # The transfer vanishes at f = 0 (directivity), the grid starts above
+            grid = _transfer_grid(
+                f[positive][0], f[-1], n_points, self.input_data.config
+            )
+        if grid is None or len(grid) >= n_positive:
+            # Interpolating would not save any evaluation
+            radiation = np.empty((len(f), obs.shape[0]))
+            psd = self.evaluate_psd(
+                f, phi_pp, ly, obs, chunk_size=chunk_size, radiation=radiation
+            )
+            return f, psd, radiation
+
+        radiation_grid = np.empty((len(grid), obs.shape[0]))
+        transfer = far_field_transfer(
+            grid,
+            obs,
+            self.input_data.config,
+            kernel=self.frequency_kernel(grid),
+            chunk_size=chunk_size,
+            radiation=radiation_grid,
+        )
+        psd = np.zeros([len(f), transfer.shape[1]])
+        psd[positive] = _log_interp(f[positive], grid, transfer)
+        psd *= (2 * self.input_data.config.L * phi_pp * ly)[:, None]
+        radiation = np.zeros_like(psd)
+        radiation[positive] = _log_interp(f[positive], grid, radiation_grid)
+        return f, psd, radiation
+
+    @profiling.instrument()
+    def compute_band_psd(
+        self,
+        fraction: int = 3,
+        f_band: tuple | None = None,
+        obs=None,
+        points_per_band: int | None = 4,
+        chunk_size: int | None = 128,
+    ):
+        """
+        Compute the far-field sound power in fractional-octave bands.
+
+        The narrowband PSD is evaluated on the Welch bins covered by the bands
+        (see :meth:`evaluate_at`) and summed over each band.
+
+        Parameters
+        ----------
+        fraction : int, optional
+            Number of bands per octave, e.g. 3 for third octaves. Default is
+            3. The bands are defined by :func:`fractional_octave_bands
+            <amiet_self_noise.preproc.fractional_octave_bands>`.
+        f_band : tuple, optional
+            Range (f_min, f_max) of the band centres in Hz. Default is the
+            whole frequency range of the spectra.
+        obs : array_like, optional
+            Observer positions [x, y, z] in meters, shape (n_obs, 3). Default
+            is the observers of the configuration.
+        points_per_band : int, optional
+            Number of frequencies per band at which the radiation integral is
+            evaluated, before interpolation. If None, it is evaluated at every
+            bin. Default is 4.
+        chunk_size : int, optional
+            Maximum number of observers evaluated in a single broadcasted
+            pass, see :meth:`evaluate_psd`. Default is 128.
+
+        Returns
+        -------
+        f_center : ndarray
+            Band centres in Hz, shape (n_bands,).
+        power : ndarray
+            Mean square pressure in each band, in Pa², shape (n_bands, n_obs).
+
+
+        .. note::
+
+            Only the bands at least as wide as the frequency resolution of
+            the spectra are returned: a narrower band does not contain enough
+            bins to resolve its level.
+        """
+        if obs is None:
+            obs = self.input_data.config.obs
+        f, _, _ = self.statistics()
+        df = f[1] - f[0]
+        if f_band is None:
+            f_band = (f[1], f[-1])
+        center, lower, upper = preproc.fractional_octave_bands(
+            max(f_band[0], df), min(f_band[1], f[-1]), fraction, df=df
+        )
+
+        n_points = None
+        if points_per_band is not None:
+            n_points = points_per_band * len(center) + 1
+        f, psd = self.evaluate_at(
+            obs,
+            chunk_size=chunk_size,
+            f_band=(lower[0], upper[-1]),
+            n_points=n_points,
+        )
+        return center, preproc.band_power(f, psd, lower, upper, df=df)
+
+    def add_observers(self, obs, chunk_size: int | None = 128):
+        """
+        Add observers to the configuration and compute only their PSD.
+
+        The new observers are appended to ``config.obs`` and their columns to
+        :attr:`psd` and :attr:`radiation`. The PSD of the existing observers
+        is computed first if it is not available yet.
+
+        Parameters
+        ----------
+        obs : array_like
+            Positions of the new observers [x, y, z] in meters, shape (3,) or
+            (n_new, 3).
+        chunk_size : int, optional
+            Maximum number of observers evaluated in a single broadcasted
+            pass, see :meth:`evaluate_psd`. Default is 128.
+
+        Returns
+        -------
+        f : ndarray
+            Frequency array in Hz, shape (n_freq,).
+        psd : ndarray
+            Power spectral density of all the observers, old and new, shape
+            (n_freq, n_obs + n_new).
+        """
+        config = self.input_data.config
+        obs = np.atleast_2d(np.asarray(obs, dtype=float))
+        if self.psd is None or self.psd.shape[1] != config.obs.shape[0]:
+            self.compute_psd(chunk_size=chunk_size, **self._psd_options)
+        f, psd, radiation = self._evaluate(obs, chunk_size, **self._psd_options)
+        config.obs = np.concatenate([config.obs, obs])
+        config.n_obs = config.obs.shape[0]
+        self.psd = np.concatenate([self.psd, psd], axis=1)
+        self.radiation = np.concatenate([self.radiation, radiation], axis=1)
+        return f, self.psd
+
+    def evaluate_psd(
+        self, f, phi_pp, ly, obs, chunk_size: int | None = 128, radiation=None
+    ):
+        """
+        Evaluate the far-field PSD for a batch of observers.
+
+        All observers of a chunk are evaluated together, broadcasting the
+        radiation integral and the directivity over an (n_freq, n_obs) grid.
+
+        Parameters
+        ----------
+        f : ndarray
+            Frequency array in Hz, shape (n_freq,).
+        phi_pp : ndarray
+            Wall pressure spectrum, shape (n_freq,).
+        ly : ndarray
+            Spanwise coherence length in meters, shape (n_freq,).
+        obs : array_like
+            Observer positions [x, y, z] in meters, shape (n_obs, 3).
+        chunk_size : int, optional
+            Maximum number of observers evaluated in a single broadcasted
+            pass. Peak memory scales with ``n_freq * chunk_size``. If None,
+            all observers are evaluated at once. Default is 128.
+        radiation : ndarray, optional
+            If given, :math:`|I|^2` is written into it, shape (n_freq, n_obs),
+            see :func:`far_field_transfer`.
+
+        Returns
+        -------
+        psd : ndarray
+            Power spectral density in Pa²/Hz, shape (n_freq, n_obs).
+        """
+        return far_field_psd(
+            f,
+            phi_pp,
+            ly,
+            obs,
+            self.input_data.config,
+            kernel=self.frequency_kernel(f),
+            chunk_size=chunk_size,
+            radiation=radiation,
+        )
+
+    @profiling.instrument()
+    def compute_spectra(self):
+        """
+        Compute the Welch spectra of all the sensors in a single pass.
+
+        Every segment of every sensor is windowed and Fourier transformed
+        once; the wall pressure spectrum and the coherence length are both
+        derived from the result, which is kept in :attr:`spectra`.
+
+        Returns
+        -------
+        spectra : CrossSpectra
+            Auto-spectra of all sensors and cross-spectra with the reference
+            sensor, see :class:`CrossSpectra
+            <amiet_self_noise.preproc.CrossSpectra>`.
+
+
+        .. note::
+
+            The spectra are computed using:
+
+            - Segment length: ``config.nperseg``, or N/8 samples (where N is
+              total number of samples) if not given
+            - Overlap: 50% of segment length
+            - Window: Hanning window
+            - Reference position at the middle of the measurement array
+
+            The pressure is processed in blocks of time steps, so that in
+            streaming mode (``config.streaming``) the memory usage only depends
+            on the segment length, not on the length of the record.
+
+            With ``config.precision = 'single'`` the pressure is read and
+            transformed in float32/complex64, halving the memory traffic of the
+            spectral estimation; the averages are accumulated in float64 (see
+            :class:`WelchAccumulator <amiet_self_noise.preproc.WelchAccumulator>`).
+
+            If ``config.cache`` is set, the spectra are first looked up in the
+            on-disk cache (see :class:`SpectraCache
+            <amiet_self_noise.cache.SpectraCache>`), and stored there after
+            being computed, with the wall pressure spectrum and coherence
+            length of every chord-wise station (``phi_pp`` and ``ly``, shape
+            (n_stations, n_freq)) and their positions (``station_x``), which
+            only depend on the spectra and not on ``station_mode``.
+
+        """
+        if self.spectra is not None:
+            return self.spectra
+
+        parameters = self._spectral_parameters()
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(
+                precision=self.input_data.config.precision, **parameters
+            )
+            self.spectra = self.cache.load(key)
+            if self.spectra is not None:
+                return self.spectra
+
+        accumulator = self.welch_accumulator()
+        # Blocks aligned on the Welch segments, the overlap is carried over
+        block_size = 16 * accumulator.step
+        for block in self.input_data.iter_pressure(block_size):
+            accumulator.update(block)
+        self.spectra = accumulator.result()
+
+        if key is not None:
+            self.cache.store(
+                key,
+                self.spectra,
+                phi_pp=self._station_wps(self.spectra),
+                ly=self._station_ly(self.spectra),
+                station_x=self._station_x(),
+            )
+        return self.spectra
+
+    def welch_accumulator(self, nperseg: int | None = None):
+        """
+        Return an empty accumulator with the settings of :meth:`compute_spectra`.
+
+        Parameters
+        ----------
+        nperseg : int, optional
+            Length of the Welch segments. Default is ``config.nperseg``, or
+            one eighth of the record.
+
+        Returns
+        -------
+        accumulator : WelchAccumulator
+            The accumulator, see :class:`WelchAccumulator
+            <amiet_self_noise.preproc.WelchAccumulator>`.
+        """
+        return preproc.WelchAccumulator(
+            self.input_data.pos.shape[0],
+            fs=self.input_data.fs,
+            workers=self.n_workers,
+            dtype=self.input_data.config.dtype,
+            **self._spectral_parameters(nperseg),
+        )
+
+    def _spectral_parameters(self, nperseg=None):
+        nperseg = (
+            nperseg
+            or self.input_data.config.nperseg
+            or self.input_data.n_time_steps // 8
+        )
+        n_sensors = self.input_data.pos.shape[0]
+        ref_index = n_sensors // 2
+        labels = self._stations()
+        if labels.max() > 0:
+            # One reference per chord-wise station, in the middle of its line
+            ref_index = np.empty(n_sensors, dtype=int)
+            for station in range(labels.max() + 1):
+                members = np.flatnonzero(labels == station)
+                ref_index[members] = members[members.size // 2]
+        return dict(
+            nperseg=nperseg,
+            noverlap=nperseg // 2,
+            window="hann",
+            ref_index=ref_index,
+            cross_matrix=self.input_data.config.coherence_method == "pairs",
+        )
+
+    def _cache_key(self, **spectral_parameters) -> str:
+        # Everything the spectra depend on: the data and mesh files, the probe
+        # selection, the de-normalization (through the pressure scale and the
+        # sampling frequency) and the spectral parameters
+        input_data = self.input_data
+        config = input_data.config
+        data = [
+            self.cache.file_signature(path) for path in data_files(config.data_path)
+        ]
+        return self.cache.make_key(
+            data=data[0] if len(data) == 1 else data,
+            mesh=self.cache.file_signature(config.mesh_path),
+            data_type=config.data_type,
+            probes=getattr(input_data, "_probe_idx", None),
+            p_scale=getattr(input_data, "_p_scale", 1.0),
+            fs=input_data.fs,
+            n_time_steps=input_data.n_time_steps,
+            **spectral_parameters,
+        )
+
+    @profiling.instrument()
     def compute_wps(self):
         """
         Compute the wall pressure spectrum from pressure measurements.
         
         This method calculates the wall pressure spectrum using Welch's 
-        method with Hanning window and 50% overlap.
+        method with Hanning window and 50% overlap, averaged over all sensors.
         
         Returns
         -------
@@ -109,30 +585,19 @@ class AmietModel:
 
         .. note::
 
-            The spectrum is computed using:
-
-            - Segment length: N/8 samples (where N is total number of samples)
-            - Overlap: 50% of segment length
-            - Window: Hanning window
-            - No additional filtering is applied (filter=False)
+            The spectrum is taken from :meth:`compute_spectra`, so it shares
+            its segments with :meth:`compute_coherence`. No additional
+            filtering is applied. With several chord-wise stations, the
+            spectra of the stations are combined according to
+            ``config.station_mode``, see :meth:`station_statistics`.
 
         """
-        N = self.input_data.pressure.shape[1]
-        nperseg = N // 8
-        noverlap = nperseg // 2
-        window = "hann"
-        f, phi_pp = preproc.spectrum(
-            self.input_data.pressure,
-            fs=self.input_data.fs,
-            filter=False,
-            avg=0,
-            nperseg=nperseg,
-            noverlap=noverlap,
-            window=window,
-        )
+        spectra = self.compute_spectra()
+        phi_pp = self._combine(self._station_wps(spectra), log=True)
 
-        return f, phi_pp
+        return spectra.f, phi_pp
 
+    @profiling.instrument()
     def compute_coherence(self):
         """
         Compute the spanwise coherence length from pressure measurements.
@@ -153,34 +618,167 @@ class AmietModel:
 
             The coherence length is computed using:
 
-            - Bandpass filtering between 1600-8000 Hz (2nd order)
-            - Reference position at the middle of the measurement array
-            - Same windowing parameters as wall pressure spectrum
+            - Reference position at the middle of the measurement array (of
+              each chord-wise station, see :meth:`station_statistics`)
+            - The same segments as the wall pressure spectrum
+              (see :meth:`compute_spectra`)
             - Hanning window with 50% overlap
+
+            No bandpass filter is applied: the same linear filter applied to
+            both sensors of a pair cancels out in the coherence.
+
+            With ``config.coherence_method = 'pairs'``, the full cross-spectral
+            matrix is accumulated instead, and the coherence at each spanwise
+            separation :math:`\\eta` is averaged over all the sensor pairs of a
+            station at that separation, see
+            :func:`separation_coherence
+            <amiet_self_noise.preproc.separation_coherence>`. The coherence
+            length is then :math:`2\\int_0^{\\eta_{max}} \\sqrt{\\gamma(\\eta)}
+            \\,d\\eta`, with :math:`\\eta_{max}` half the spanwise extent of the
+            sensors, the range covered by the middle reference. On a line of
+            32 sensors, this reduces the scatter of :math:`\\ell_y` between
+            records of the same length by about 30%, that of a record about
+            twice as long with the middle reference. The bias of the
+            coherence, set by the number of segments, is unchanged. The matrix
+            takes :math:`16 n_{sensors}^2` bytes per frequency.
             
         The coherence length represents the spanwise extent over which
         pressure fluctuations remain correlated.
 
         """
-        N = self.input_data.pressure.shape[1]
-        nperseg = N // 8
-        noverlap = nperseg // 2
-        window = "hann"
-        f, ly = preproc.coherence_length(
-            self.input_data.pressure,
-            z=self.input_data.pos[:, 2],
-            ref_index=self.input_data.pos.shape[0] // 2,
-            fs=self.input_data.fs,
-            filter=True,
-            flims=(1600, 8000),
-            order=2,
-            nperseg=nperseg,
-            noverlap=noverlap,
-            window=window,
+        spectra = self.compute_spectra()
+        return spectra.f, self._combine(self._station_ly(spectra))
+
+    @profiling.instrument()
+    def station_statistics(self):
+        """
+        Return the wall-pressure statistics of every chord-wise station.
+
+        The sensors selected by ``xprobes`` and ``yprobes`` are read and
+        transformed in a single pass (see :meth:`compute_spectra`); the
+        sensors of each chord-wise index of the mesh form a station, a
+        spanwise line with its own reference sensor.
+
+        Returns
+        -------
+        x : ndarray
+            Chord-wise position of the stations in meters, shape (n_stations,).
+        f : ndarray
+            Frequency array in Hz, shape (n_freq,).
+        phi_pp : ndarray
+            Wall pressure spectrum of every station in Pa²·s, shape
+            (n_stations, n_freq).
+        ly : ndarray
+            Spanwise coherence length of every station in meters, shape
+            (n_stations, n_freq).
+
+
+        .. note::
+
+            :meth:`compute_wps` and :meth:`compute_coherence` combine the
+            stations according to ``config.station_mode``:
+
+            - ``'average'``: the mean over the stations
+            - ``'nearest'``: the station nearest the trailing edge
+              (``config.x_te``)
+            - ``'extrapolate'``: a least-squares line along the chord of
+              :math:`\\log \\Phi_{pp}` and :math:`\\ell_y`, at every
+              frequency, evaluated at the trailing edge
+
+            With a single station the three modes are identical.
+
+        """
+        spectra = self.compute_spectra()
+        return (
+            self._station_x(),
+            spectra.f,
+            self._station_wps(spectra),
+            self._station_ly(spectra),
+        )
+
+    def _stations(self):
+        # The station of every sensor: the probes of one chord-wise index of
+        # the mesh (or of one chord-wise position without a probe selection)
+        probe_idx = getattr(self.input_data, "_probe_idx", None)
+        if probe_idx is not None:
+            chord = np.repeat(probe_idx[0], np.size(probe_idx[1]))
+        else:
+            chord = self.input_data.pos[:, 0]
+        return np.unique(chord, return_inverse=True)[1]
+
+    def _station_x(self):
+        labels = self._stations()
+        x = np.bincount(labels, weights=self.input_data.pos[:, 0])
+        return x / np.bincount(labels)
+
+    def _station_wps(self, spectra):
+        labels = self._stations()
+        return np.stack(
+            [spectra.auto[labels == s].mean(axis=0) for s in range(labels.max() + 1)]
         )
-        return f, ly
 
-    def compute_radiation_integral(self, f, observer):
+    def _station_ly(self, spectra):
+        labels = self._stations()
+        z = self.input_data.pos[:, 2]
+        return np.stack(
+            [
+                _coherence_length(spectra.select(labels == s), z[labels == s])
+                for s in range(labels.max() + 1)
+            ]
+        )
+
+    def _combine(self, values, log=False):
+        # Combine the statistics of the stations, shape (n_stations, n_freq)
+        if values.shape[0] == 1:
+            return values[0]
+        config = self.input_data.config
+        x = self._station_x()
+        x_te = x.max()
+        if config.x_te is not None:
+            x_te = config.x_te * getattr(self.input_data, "_pos_scale", 1.0)
+        if config.station_mode == "average":
+            return values.mean(axis=0)
+        if config.station_mode == "nearest":
+            return values[np.argmin(np.abs(x - x_te))]
+        y = np.log(np.maximum(values, np.finfo(float).tiny)) if log else values
+        slope, intercept = np.polyfit(x, y, 1)
+        value = slope * x_te + intercept
+        return np.exp(value) if log else np.maximum(value, 0.0)
+
+    def frequency_kernel(self, f):
+        """
+        Return the observer-independent terms of the radiation integral.
+
+        The kernel is built once per frequency array and flow condition and
+        kept in :attr:`kernel`, so that it is reused across observers and
+        across successive calls.
+
+        Parameters
+        ----------
+        f : ndarray
+            Frequency array in Hz, shape (n_freq,).
+
+        Returns
+        -------
+        kernel : FrequencyKernel
+            The cached frequency kernel.
+        """
+        config = self.input_data.config
+        omega = np.asarray(f, dtype=float) * 2 * np.pi  # angular frequency
+        flow = dict(
+            U0=config.U0,
+            c0=config.c0,
+            M0=config.M0,
+            b=config.b,
+            alpha=config.alpha,
+            fresnel_tol=config.fresnel_tol,
+        )
+        if self.kernel is None or not self.kernel.matches(omega, **flow):
+            self.kernel = ri.compute_frequency_kernel(omega, **flow)
+        return self.kernel
+
+    @profiling.instrument()
+    def compute_radiation_integral(self, f, observer, kernel=None):
         """
         Compute the Amiet radiation integral for a given observer.
         
@@ -193,12 +791,17 @@ class AmietModel:
         f : ndarray
             Frequency array in Hz, shape (n_freq,).
         observer : array_like
-            Observer position [x, y, z] in meters, shape (3,).
+            Observer position [x, y, z] in meters, shape (3,), or a batch of
+            observer positions, shape (n_obs, 3).
+        kernel : FrequencyKernel, optional
+            Precomputed observer-independent terms for ``f``. If None, the
+            kernel is obtained from :meth:`frequency_kernel`.
             
         Returns
         -------
         I : ndarray, complex
-            Complex radiation integral values, shape (n_freq,).
+            Complex radiation integral values, shape (n_freq,) for a single
+            observer or (n_freq, n_obs) for a batch.
             
 
         .. note::
@@ -206,28 +809,183 @@ class AmietModel:
             The radiation integral is computed using:
 
             - Observer distance S0 corrected for Mach number effects
-            - Fixed alpha parameter = 0.7 (empirical constant)
+            - Convection velocity ratio ``config.alpha`` (0.7 by default)
+            - Exact Fresnel integrals, or tabulated ones accurate to
+              ``config.fresnel_tol`` if it is set
             
         The integral represents the acoustic transfer function from
         surface pressure fluctuations to far-field sound pressure.
 
         .. warning::
 
-            The current version only supports constant convection velocity, fixed to 
-            0.7 of the freestream velocity.
-
-        """
-        beta2 = 1 - self.input_data.config.M0**2
-        S0 = np.sqrt(observer[0] ** 2 + beta2 * (observer[1] ** 2 + observer[2] ** 2))
-        I = ri.compute_radiation_integral(
-            omega_array=f * 2 * np.pi,  # Convert frequency to angular frequency
-            U0=self.input_data.config.U0,
-            c0=self.input_data.config.c0,
-            x1=observer[0],
-            S0=S0,
-            M0=self.input_data.config.M0,
-            b=self.input_data.config.b,
-            alpha=0.7,  # TODO: make this a parameter in the config
+            The current version only supports a convection velocity that is
+            constant over the frequencies.
+
+        """
+        observer = np.asarray(observer, dtype=float)
+        S0 = _corrected_distance(observer, self.input_data.config.M0)
+        if kernel is None:
+            kernel = self.frequency_kernel(f)
+        I = ri.evaluate_radiation_integral(kernel, x1=observer[..., 0], S0=S0)
+
+        return I
+
+
+def far_field_psd(
+    f, phi_pp, ly, obs, config, kernel=None, chunk_size=128, radiation=None
+):
+    """
+    Evaluate the far-field PSD from the wall-pressure statistics.
+
+    This is the computation behind :meth:`AmietModel.evaluate_psd`, for
+    statistics and flow conditions that are not tied to an :class:`AmietModel`.
+
+    Parameters
+    ----------
+    f : ndarray
+        Frequency array in Hz, shape (n_freq,).
+    phi_pp : ndarray
+        Wall pressure spectrum, shape (n_freq,).
+    ly : ndarray
+        Spanwise coherence length in meters, shape (n_freq,).
+    obs : array_like
+        Observer positions [x, y, z] in meters, shape (n_obs, 3).
+    config : ConfigData
+        Flow conditions and geometry.
+    kernel : FrequencyKernel, optional
+        Observer-independent terms of the radiation integral for ``f`` and
+        ``config``. If None, they are computed here.
+    chunk_size : int, optional
+        Maximum number of observers evaluated in a single broadcasted pass.
+        If None, all observers are evaluated at once. Default is 128.
+    radiation : ndarray, optional
+        If given, :math:`|I|^2` is written into it, see
+        :func:`far_field_transfer`.
+
+    Returns
+    -------
+    psd : ndarray
+        Power spectral density in Pa²/Hz, shape (n_freq, n_obs).
+    """
+    psd = far_field_transfer(
+        f, obs, config, kernel=kernel, chunk_size=chunk_size, radiation=radiation
+    )
+    psd *= (2 * config.L * phi_pp * ly)[:, None]
+    return psd
+
+
+def far_field_transfer(f, obs, config, kernel=None, chunk_size=128, radiation=None):
+    """
+    Evaluate the acoustic transfer from the wall pressure to the observers.
+
+    The transfer :math:`D \\cdot |I|^2` is the part of the far-field PSD that
+    does not depend on the wall-pressure statistics: the PSD is the transfer
+    times the source term :math:`2L \\cdot \\Phi_{pp} \\cdot \\ell_y`. It
+    varies smoothly with the frequency, so that it can be evaluated on a
+    coarse grid and interpolated (see :meth:`AmietModel.evaluate_at`).
+
+    Parameters
+    ----------
+    f : ndarray
+        Frequency array in Hz, shape (n_freq,).
+    obs : array_like
+        Observer positions [x, y, z] in meters, shape (n_obs, 3).
+    config : ConfigData
+        Flow conditions and geometry.
+    kernel : FrequencyKernel, optional
+        Observer-independent terms of the radiation integral for ``f`` and
+        ``config``. If None, they are computed here.
+    chunk_size : int, optional
+        Maximum number of observers evaluated in a single broadcasted pass.
+        If None, all observers are evaluated at once. Default is 128.
+    radiation : ndarray, optional
+        If given, the squared modulus of the radiation integral
+        :math:`|I|^2` evaluated for the transfer is written into it, shape
+        (n_freq, n_obs), so that it is not evaluated a second time.
+
+    Returns
+    -------
+    transfer : ndarray
+        The transfer in 1/m², shape (n_freq, n_obs).
+    """
+    f = np.asarray(f, dtype=float)
+    obs = np.atleast_2d(np.asarray(obs, dtype=float))
+    n_obs = obs.shape[0]
+    if chunk_size is None:
+        chunk_size = max(n_obs, 1)
+    if kernel is None:
+        kernel = ri.compute_frequency_kernel(
+            f * 2 * np.pi,
+            U0=config.U0,
+            c0=config.c0,
+            M0=config.M0,
+            b=config.b,
+            alpha=config.alpha,
+            fresnel_tol=config.fresnel_tol,
         )
 
-        return I
\ No newline at end of file
+    beta2 = 1 - config.M0**2
+
+    transfer = np.zeros([len(f), n_obs])
+    for start in range(0, n_obs, chunk_size):
+        chunk = obs[start : start + chunk_size]
+        S0 = _corrected_distance(chunk, config.M0)
+        I = np.abs(ri.evaluate_radiation_integral(kernel, chunk[:, 0], S0)) ** 2
+        S02 = chunk[:, 0] ** 2 + beta2 * (chunk[:, 1] ** 2 + chunk[:, 2] ** 2)
+        directivity = (chunk[:, 2] * f[:, None] * config.b / config.c0 / S02) ** 2
+        transfer[:, start : start + chunk_size] = directivity * I
+        if radiation is not None:
+            radiation[:, start : start + chunk_size] = I
+
+    return transfer
+
+
+def _coherence_length(spectra, z):
+    # Coherence length of one spanwise line of sensors
+    if spectra.matrix is None:
+        return np.trapezoid(np.sqrt(spectra.coherence), x=z, axis=0)
+    eta, gamma, _ = preproc.separation_coherence(spectra, z)
+    # Same range of separations as the middle reference, on both sides,
+    # closed by linear interpolation between the nearest separations
+    eta_max = np.ptp(z) / 2
+    root = np.sqrt(gamma)
+    n = np.searchsorted(eta, eta_max * (1 + 1e-9))
+    x, y = eta[:n], root[:n]
+    if n < eta.size and x[-1] < eta_max:
+        w = (eta_max - eta[n - 1]) / (eta[n] - eta[n - 1])
+        x = np.append(x, eta_max)
+        y = np.vstack([y, (1 - w) * root[n - 1] + w * root[n]])
+    return 2 * np.trapezoid(y, x=x, axis=0)
+
+
+def _transfer_grid(f_min, f_max, n_points, config):
+    # Logarithmic grid of n_points frequencies, whose spacing is capped to an
+    # eighth of the shortest period of the chord interference in the transfer:
+    # above the frequency f_c where the cap is reached, the grid is linear
+    max_step = config.c0 * (1 - config.M0) / (4 * config.b) / 8
+    log_step = np.log(f_max / f_min) / (n_points - 1)
+    f_c = max_step / np.expm1(log_step)
+    if f_c >= f_max:
+        return np.geomspace(f_min, f_max, n_points)
+    if f_c <= f_min:
+        return np.linspace(f_min, f_max, int(np.ceil((f_max - f_min) / max_step)) + 1)
+    n_log = int(np.ceil(np.log(f_c / f_min) / log_step)) + 1
+    n_linear = int(np.ceil((f_max - f_c) / max_step)) + 1
+    return np.concatenate(
+        [np.geomspace(f_min, f_c, n_log), np.linspace(f_c, f_max, n_linear)[1:]]
+    )
+
+
+def _log_interp(x, xp, fp):
+    # Log-log cubic spline interpolation of the columns of fp (positive
+    # values) from the increasing abscissae xp onto x
+    log_fp = np.log(np.maximum(fp, np.finfo(float).tiny))
+    return np.exp(CubicSpline(np.log(xp), log_fp, axis=0)(np.log(x)))
+
+
+def _corrected_distance(observer, M0):
+    # Observer distance S0 corrected for Mach number effects
+    beta2 = 1 - M0**2
+    return np.sqrt(
+        observer[..., 0] ** 2 + beta2 * (observer[..., 1] ** 2 + observer[..., 2] ** 2)
+    )
@@ -0,0 +1,312 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import yaml
+from rich.console import Console
+
+from amiet_self_noise.amiet_model import AmietModel
+from amiet_self_noise.io_utils import (
+    InputData,
+    PressureSlabs,
+    probe_indices,
+    read_config,
+    write_results,
+)
+
+INDEX_NAME = "index.json"
+"""The name of the index of a batch, in its output directory."""
+
+
+def run_batch(
+    configs,
+    out_dir: str,
+    n_workers: int | None = None,
+    memory_limit: int | None = None,
+    resume: bool = True,
+    chunk_size: int | None = 128,
+    console: Console | None = None,
+) -> dict:
+    """
+    Run the Amiet model on many cases, distributed over a pool of processes.
+
+    Each case is a configuration file, processed like a single run: its data
+    is read with :class:`InputData <amiet_self_noise.io_utils.InputData>` and
+    its PSD computed with :meth:`AmietModel.compute_psd
+    <amiet_self_noise.amiet_model.AmietModel.compute_psd>`. The results of
+    each case are written to ``out_dir/cases/<case>.h5`` by
+    :func:`write_results <amiet_self_noise.io_utils.write_results>`, and the
+    status of all the cases to the index ``out_dir/index.json``, which is
+    updated as soon as a case finishes.
+
+    Parameters
+    ----------
+    configs : str or list of str
+        Paths or glob patterns of the configuration files, e.g.
+        ``'cases/*/config.yaml'``.
+    out_dir : str
+        The output directory of the batch. It is created if needed.
+    n_workers : int, optional
+        The maximum number of cases run at the same time. Default is the
+        number of CPUs.
+    memory_limit : int, optional
+        The memory, in bytes, that the running cases may use together, from
+        an estimate of their needs (see :func:`estimate_memory`). A case that
+        needs more than the limit on its own is run alone. Default is 80% of
+        the available memory, or no limit if it cannot be determined.
+    resume : bool, optional
+        If True, the cases that are done in an existing index (and whose
+        configuration has not been modified since) are not run again, so
+        that a batch interrupted by a crash resumes where it stopped. Failed
+        cases are retried. Default is True.
+    chunk_size : int, optional
+        The maximum number of observers evaluated at once, see
+        :meth:`AmietModel.evaluate_psd
+        <amiet_self_noise.amiet_model.AmietModel.evaluate_psd>`.
+    console : rich.console.Console, optional
+        Console on which the progress is printed. If None, creates a new one.
+
+    Returns
+    -------
+    index : dict
+        The index of the batch: for each case, the path to its configuration,
+        its ``status`` (``'done'`` or ``'failed'``), the path to its results
+        relative to ``out_dir``, its duration and, for failed cases, the error.
+
+    Examples
+    --------
+
+    .. code-block:: bash
+
+        python run_batch.py "cases/*/config.yaml" --out-dir results -j 8
+    """
+    if console is None:
+        console = Console()
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if memory_limit is None:
+        memory_limit = _available_memory()
+
+    os.makedirs(os.path.join(out_dir, "cases"), exist_ok=True)
+    index_path = os.path.join(out_dir, INDEX_NAME)
+    index = {"cases": {}}
+    if resume and os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+
+    pending = []
+    for config_path in expand_configs(configs):
+        case = case_name(config_path)
+        entry = index["cases"].get(case)
+        mtime = os.stat(config_path).st_mtime_ns
+        if (
+            entry is not None
+            and entry["status"] == "done"
+            and entry.get("config_mtime") == mtime
+            and os.path.exists(os.path.join(out_dir, entry["result"]))
+        ):
+            continue
+        index["cases"][case] = {
+            "config": config_path,
+            "config_mtime": mtime,
+            "status": "pending",
+            "result": os.path.join("cases", f"{case}.h5"),
+        }
+        pending.append((case, config_path, _safe_estimate(config_path)))
+
+    n_done = len(index["cases"]) - len(pending)
+    console.print(
+        f"[bold]Batch:[/bold] {len(pending)} case(s) to run, {n_done} already done"
+    )
+    _write_index(index, index_path)
+
+    running = {}
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        while pending or running:
+            # Start the cases that fit in the memory left, in order
+            in_use = sum(estimate for _, estimate in running.values())
+            for item in list(pending):
+                if len(running) >= n_workers:
+                    break
+                case, config_path, estimate = item
+                if running and in_use + estimate > memory_limit:
+                    continue
+                pending.remove(item)
+                result_path = os.path.join(out_dir, index["cases"][case]["result"])
+                future = pool.submit(_run_case, config_path, result_path, chunk_size)
+                running[future] = (case, estimate)
+                in_use += estimate
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                case, _ = running.pop(future)
+                entry = index["cases"][case]
+                try:
+                    entry.update(future.result(), status="done")
+                    console.print(
+                        f"  [green]done[/green]    {case} ({entry['duration']:.1f} s)"
+                    )
+                except Exception as error:
+                    message = f"{type(error).__name__}: {error}"
+                    entry.update(status="failed", error=message)
+                    console.print(f"  [red]failed[/red]  {case}: {entry['error']}")
+                _write_index(index, index_path)
+
+    return index
+
+
+def expand_configs(configs) -> list:
+    """Return the sorted, absolute paths matching the given paths or patterns."""
+    if isinstance(configs, str):
+        configs = [configs]
+    paths = set()
+    for pattern in configs:
+        matches = glob.glob(pattern, recursive=True)
+        if not matches and not glob.has_magic(pattern):
+            raise FileNotFoundError(f"Configuration file not found: {pattern}")
+        paths.update(os.path.abspath(path) for path in matches)
+    return sorted(paths)
+
+
+def case_name(config_path: str) -> str:
+    """Return the name of a case in the index: the name of the configuration
+    file (or of its directory, for files named ``config.yaml``) and a short hash
+    of its absolute path, which keeps the names unique."""
+    config_path = os.path.abspath(config_path)
+    stem = os.path.splitext(os.path.basename(config_path))[0]
+    if stem == "config":
+        stem = os.path.basename(os.path.dirname(config_path))
+    digest = hashlib.sha1(config_path.encode()).hexdigest()[:8]
+    return f"{stem}-{digest}"
+
+
+def estimate_memory(config) -> int:
+    """
+    Estimate the memory needed to process a case, in bytes.
+
+    The estimate covers the pressure (the whole record, or the blocks read at
+    once in streaming and lazy modes) and the Welch spectra of all the
+    sensors. It only reads the shape of the pressure datasets.
+
+    Parameters
+    ----------
+    config : ConfigData
+        The configuration of the case.
+
+    Returns
+    -------
+    n_bytes : int
+        The estimated memory.
+    """
+    slabs = PressureSlabs(config.data_path)
+    shape = (slabs.n_time_steps,) + slabs.spatial_shape
+    n_sensors = (
+        probe_indices(config.xprobes, shape[1]).size
+        * probe_indices(config.yprobes, shape[2]).size
+    )
+    n_time = shape[0]
+    nperseg = config.nperseg or n_time // 8
+    itemsize = np.dtype(np.float64).itemsize
+    # Auto-spectra (real) and cross-spectra (complex) of every sensor, always
+    # accumulated in double precision
+    spectra = 3 * n_sensors * (nperseg // 2 + 1) * itemsize
+    if config.coherence_method == "pairs":
+        # The cross-spectral matrix, its update and the coherence of the pairs
+        spectra += 5 * n_sensors**2 * (nperseg // 2 + 1) * itemsize
+    itemsize = config.dtype.itemsize  # the pressure and its transforms
+    if config.streaming or config.lazy:
+        # Block of 16 hops, its windowed segments and their FFT
+        pressure = 3 * 16 * (nperseg // 2) * n_sensors * itemsize
+    else:
+        # The record and the copy made while de-normalizing and transposing
+        pressure = 2 * n_time * n_sensors * itemsize
+    return pressure + spectra
+
+
+def _safe_estimate(config_path):
+    # A case whose configuration or files cannot be read is scheduled anyway,
+    # its run reports the error; any other error is a bug of the estimate and
+    # is raised
+    try:
+        config = read_config(config_path)
+    except (OSError, KeyError, ValueError, TypeError, yaml.YAMLError):
+        return 0
+    try:
+        return estimate_memory(config)
+    except (OSError, KeyError, ValueError):
+        return 0
+
+
+def _available_memory():
+    try:
+        pages = os.sysconf("SC_AVPHYS_PAGES")
+        page_size = os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return float("inf")
+    return int(0.8 * pages * page_size)
+
+
+def _run_case(config_path, result_path, chunk_size):
+    # Run a single case in a worker process
+    start = time.perf_counter()
+    input_data = InputData(config_path)
+    model = AmietModel(input_data)
+    f, psd = model.compute_psd(chunk_size=chunk_size)
+    _, phi_pp = model.compute_wps()
+    _, ly = model.compute_coherence()
+    write_results(
+        result_path,
+        f,
+        psd,
+        input_data.config,
+        phi_pp=phi_pp,
+        ly=ly,
+        radiation=model.radiation,
+    )
+    return {
+        "duration": time.perf_counter() - start,
+        "n_freq": int(f.shape[0]),
+        "n_obs": int(psd.shape[1]),
+    }
+
+
+def _write_index(index, path):
+    # Write the index atomically, so that a crash never corrupts it
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main(argv=None) -> int:
+    """Command line entry point of :func:`run_batch`, see ``run_batch.py``."""
+    parser = argparse.ArgumentParser(
+        prog="run_batch.py",
+        description="Run the Amiet model on many cases.",
+    )
+    parser.add_argument("configs", nargs="+", help="configuration files or patterns")
+    parser.add_argument("-o", "--out-dir", required=True, help="output directory")
+    parser.add_argument("-j", "--workers", type=int, help="number of processes")
+    parser.add_argument(
+        "--memory-limit", type=float, help="memory of the running cases, in GB"
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="run all the cases again"
+    )
+    args = parser.parse_args(argv)
+
+    memory_limit = None if args.memory_limit is None else int(args.memory_limit * 1e9)
+    index = run_batch(
+        args.configs,
+        args.out_dir,
+        n_workers=args.workers,
+        memory_limit=memory_limit,
+        resume=not args.restart,
+    )
+    done = all(entry["status"] == "done" for entry in index["cases"].values())
+    return 0 if done else 1
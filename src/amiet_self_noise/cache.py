@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import h5py
+import numpy as np
+
+from amiet_self_noise.preproc import CrossSpectra
+
+
+class SpectraCache:
+    """Persistent, content-addressed cache of Welch spectra.
+
+    Each entry is an HDF5 file named after the hash of everything the spectra
+    depend on (data files, probe selection, normalization and spectral
+    parameters), so that an entry is never stale: if any of these changes, the
+    key changes. The total size of the cache is bounded; when it is exceeded,
+    the least recently used entries are deleted.
+
+    Parameters
+    ----------
+    directory: str
+        The directory of the cache. It is created if needed.
+    max_size: int, optional
+        The maximum total size of the cache, in bytes. Default is 1 GB.
+    hash_files: bool, optional
+        If True, data files are identified by a hash of their content instead
+        of their size and modification time. Safer, but every lookup reads
+        the whole file. Default is False.
+
+    Attributes
+    ----------
+    hits: int
+        The number of successful lookups.
+    misses: int
+        The number of failed lookups.
+    """
+
+    def __init__(
+        self, directory: str, max_size: int = 1024**3, hash_files: bool = False
+    ):
+        self.directory = directory
+        self.max_size = max_size
+        self.hash_files = hash_files
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def file_signature(self, path: str) -> dict:
+        """Return the identity of a data file, used in the cache keys."""
+        stat = os.stat(path)
+        signature = {"path": os.path.abspath(path), "size": stat.st_size}
+        if self.hash_files:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            signature["sha256"] = digest.hexdigest()
+        else:
+            signature["mtime_ns"] = stat.st_mtime_ns
+        return signature
+
+    @staticmethod
+    def make_key(**parts) -> str:
+        """Hash the given parts (JSON serializable) into a cache key."""
+        text = json.dumps(parts, sort_keys=True, default=_to_json)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.h5")
+
+    def load(self, key: str) -> CrossSpectra | None:
+        """Return the cached spectra for ``key``, or None if not cached."""
+        path = self._path(key)
+        try:
+            with h5py.File(path, "r") as f:
+                spectra = CrossSpectra(
+                    f=f["f"][:],
+                    auto=f["auto"][:],
+                    cross=f["cross"][:],
+                    ref_index=_ref_index(
+                        f["ref_index"][()] if "ref_index" in f else f.attrs["ref_index"]
+                    ),
+                    n_segments=int(f.attrs["n_segments"]),
+                    matrix=f["matrix"][:] if "matrix" in f else None,
+                )
+        except (OSError, KeyError):
+            self.misses += 1
+            return None
+        os.utime(path)  # mark as recently used
+        self.hits += 1
+        return spectra
+
+    def store(self, key: str, spectra: CrossSpectra, **extra) -> None:
+        """Store the spectra for ``key``, then evict old entries if needed.
+
+        Parameters
+        ----------
+        key: str
+            The cache key, from :meth:`make_key`.
+        spectra: CrossSpectra
+            The spectra to store.
+        **extra: dict, optional
+            Additional arrays derived from the spectra (e.g. ``phi_pp`` and
+            ``ly``), stored alongside them for external tools.
+        """
+        # Write to a temporary file first, so that readers never see a partial
+        # entry and a crash does not leave a corrupted one
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        os.close(fd)
+        try:
+            with h5py.File(tmp_path, "w") as f:
+                f.create_dataset("f", data=spectra.f)
+                f.create_dataset("auto", data=spectra.auto)
+                f.create_dataset("cross", data=spectra.cross)
+                if spectra.matrix is not None:
+                    f.create_dataset("matrix", data=spectra.matrix)
+                for name, value in extra.items():
+                    f.create_dataset(name, data=value)
+                # A dataset, as there is one reference per sensor with several
+                # chord-wise stations (attributes are limited to 64 kB)
+                f.create_dataset("ref_index", data=spectra.ref_index)
+                f.attrs["n_segments"] = spectra.n_segments
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def entries(self) -> list:
+        """Return the (path, size, last use) of the entries, oldest first."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".h5"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append(
+                    (os.path.join(self.directory, name), stat.st_size, stat.st_mtime_ns)
+                )
+        return sorted(entries, key=lambda entry: entry[2])
+
+    @property
+    def size(self) -> int:
+        """The total size of the cache, in bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> None:
+        """Delete the least recently used entries until the cache fits."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        # Never evict the most recent entry, even if it is too large on its own
+        for path, size, _ in entries[:-1]:
+            if total <= self.max_size:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        """Delete all the entries."""
+        for path, _, _ in self.entries():
+            os.remove(path)
+
+
+def _to_json(value):
+    # Make probe selections and numpy scalars JSON serializable for the keys
+    if isinstance(value, slice):
+        return {"slice": [value.start, value.stop, value.step]}
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot use {type(value).__name__} in a cache key.")
+
+
+def _ref_index(value):
+    # A single reference sensor, or one reference per sensor
+    return int(value) if np.ndim(value) == 0 else np.asarray(value, dtype=int)
@@ -1,9 +1,14 @@
 import os
+import re
+import glob
+import json
 import h5py
 import yaml
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 
 import numpy as np
 
@@ -11,6 +16,8 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.markdown import Markdown
 
+from amiet_self_noise import profiling
+
 
 @dataclass
 class ConfigData:
@@ -33,8 +40,69 @@ class ConfigData:
         The free stream velocity, in meters per second.
     data_type: str
         The type of data. Currently only 'dns' is supported.
-    data_path: str
-        The path to the data file.
+    data_path: str or list of str
+        The path to the data file, or the paths or glob patterns of the files
+        of a record split into time slabs, see :class:`PressureSlabs`.
+    xprobes: int, list or str, optional
+        The probes selected in the chord-wise direction of the mesh: an index,
+        a list of indices, a boolean mask or a range in slice notation
+        (``'10:50:2'``), see :func:`probe_indices`. Default is None (all the
+        probes).
+    yprobes: int, list or str, optional
+        The probes selected in the span-wise direction, as ``xprobes``.
+    alpha: float, optional
+        The convection velocity ratio :math:`U_c/U_0`. Default is 0.7.
+    nperseg: int, optional
+        Length of the Welch segments, in samples. If None, one eighth of the
+        record is used.
+    streaming: bool, optional
+        If True, the pressure is never loaded in memory as a whole: it is read
+        from the data file in blocks of time steps when the spectra are
+        computed. Default is False.
+    lazy: bool, optional
+        If True, the mesh and the pressure are only read when a computation
+        accesses them; the pressure is then a :class:`PressureView`.
+        Default is False.
+    cache: bool, optional
+        If True, the Welch spectra are cached on disk, in the ``cache``
+        sub-directory of ``out_dir``, and reused by later runs on the same data
+        and spectral parameters. Default is False.
+    cache_size: float, optional
+        The maximum size of the cache, in megabytes. When it is exceeded, the
+        least recently used spectra are deleted. Default is 1024.
+    fresnel_tol: float, optional
+        If given, the Fresnel integrals of the radiation integral are
+        interpolated from a table accurate to this tolerance, see
+        :class:`FresnelTable <amiet_self_noise.radiation_integral.FresnelTable>`.
+        Default is None (exact evaluation).
+    io_workers: int, optional
+        The number of threads reading the pressure files. Default is the
+        number of files, up to 8.
+    precision: str, optional
+        The floating-point precision of the pressure and of the spectral
+        estimation, ``'single'`` (float32/complex64) or ``'double'``
+        (float64/complex128). The Welch averages, the kernel and the radiation
+        integral are always computed in double precision. Default is
+        ``'double'``.
+    coherence_method: str, optional
+        How the spanwise coherence is estimated: ``'reference'`` (every
+        sensor against the middle one) or ``'pairs'`` (averaged over all the
+        sensor pairs at each separation, from the cross-spectral matrix), see
+        :meth:`AmietModel.compute_coherence
+        <amiet_self_noise.amiet_model.AmietModel.compute_coherence>`. Default
+        is ``'reference'``.
+    station_mode: str, optional
+        How the statistics of several chord-wise stations (several
+        ``xprobes``) are combined: ``'average'`` (their mean), ``'nearest'``
+        (the station nearest the trailing edge) or ``'extrapolate'`` (a
+        linear fit along the chord, evaluated at the trailing edge), see
+        :meth:`AmietModel.station_statistics
+        <amiet_self_noise.amiet_model.AmietModel.station_statistics>`.
+        Default is ``'average'``.
+    x_te: float, optional
+        The chord-wise position of the trailing edge, in the coordinates of
+        the mesh file. Default is the largest chord-wise position of the
+        selected probes.
     """
 
     b: float
@@ -44,11 +112,23 @@ class ConfigData:
     obs: np.array
     U0: float
     data_type: str
-    data_path: str | None = None
+    data_path: str | list | None = None
     mesh_path: str | None = None
     out_dir: str | None = None
-    xprobes: int | None = None
-    yprobes: int | None = None
+    xprobes: int | list | str | None = None
+    yprobes: int | list | str | None = None
+    alpha: float = 0.7
+    nperseg: int | None = None
+    streaming: bool = False
+    lazy: bool = False
+    cache: bool = False
+    cache_size: float = 1024.0
+    fresnel_tol: float | None = None
+    io_workers: int | None = None
+    precision: str = "double"
+    coherence_method: str = "reference"
+    station_mode: str = "average"
+    x_te: float | None = None
 
     # post init fields
     c0: float = field(init=False)  #
@@ -56,8 +136,25 @@ class ConfigData:
     where :math:`R=287.05\\;\\mathrm{J\\cdot kg^{-1}\\cdot K^{-1}}` and :math:`\\gamma=1.4`."""
     M0: float = field(init=False)
     """Mach number relative to the free stream velocity"""
+    dtype: np.dtype = field(init=False)
+    """The floating-point type of the pressure, set by ``precision``."""
 
     def __post_init__(self):
+        if self.precision not in ("single", "double"):
+            raise ValueError(
+                f"Unknown precision {self.precision!r}, expected 'single' or 'double'"
+            )
+        self.dtype = np.dtype(np.float32 if self.precision == "single" else np.float64)
+        if self.coherence_method not in ("reference", "pairs"):
+            raise ValueError(
+                f"Unknown coherence method {self.coherence_method!r}, "
+                "expected 'reference' or 'pairs'"
+            )
+        if self.station_mode not in ("average", "nearest", "extrapolate"):
+            raise ValueError(
+                f"Unknown station mode {self.station_mode!r}, "
+                "expected 'average', 'nearest' or 'extrapolate'"
+            )
         self.c0 = np.sqrt(1.4 * 287.05 * self.T)
         self.M0 = self.U0 / self.c0
         self.n_obs = self.obs.shape[0]
@@ -84,6 +181,536 @@ class SensorData:
     position: np.array = None
 
 
+@dataclass
+class PSDResults:
+    """Class to hold the results of the Amiet model, see :func:`read_results`.
+
+    Parameters
+    ----------
+    f: np.array
+        Frequencies in Hz, shape (n_freq,).
+    psd: np.array
+        Far-field power spectral density in Pa²/Hz, shape (n_freq, n_obs).
+    obs: np.array
+        Observer positions in meters, shape (n_obs, 3).
+    config: ConfigData
+        The configuration of the run.
+    phi_pp: np.array, optional
+        Wall pressure spectrum, shape (n_freq,).
+    ly: np.array, optional
+        Spanwise coherence length in meters, shape (n_freq,).
+    radiation: np.array, optional
+        Squared modulus of the radiation integral :math:`|I|^2`, shape
+        (n_freq, n_obs).
+    """
+
+    f: np.array
+    psd: np.array
+    obs: np.array
+    config: ConfigData
+    phi_pp: np.array = None
+    ly: np.array = None
+    radiation: np.array = None
+
+
+def probe_indices(selection, n: int) -> np.ndarray:
+    """Convert a probe selection along one direction of the mesh to indices.
+
+    Parameters
+    ----------
+    selection: None, int, slice, range, str, list or np.array
+        The selection: None for all the probes, an index, a slice or range,
+        a string in slice notation (``'10:50:2'``, convenient in YAML), a list
+        of indices, or a boolean mask of length ``n``. Negative indices count
+        from the end.
+    n: int
+        The number of probes in that direction.
+
+    Returns
+    -------
+    indices: np.ndarray
+        The selected indices, in the requested order, shape (n_selected,).
+
+    Raises
+    ------
+    ValueError
+        If the selection is invalid or selects no probe.
+    IndexError
+        If an index is out of range.
+    """
+    if selection is None:
+        return np.arange(n)
+    requested = selection
+    if isinstance(selection, str):
+        try:
+            parts = [int(p) if p.strip() else None for p in selection.split(":")]
+        except ValueError:
+            parts = []
+        if not 1 < len(parts) <= 3:
+            raise ValueError(f"Invalid probe selection: {selection!r}.")
+        selection = slice(*parts)
+    if isinstance(selection, (slice, range)):
+        selection = slice(selection.start, selection.stop, selection.step)
+        indices = np.arange(n)[selection]
+    else:
+        indices = np.atleast_1d(np.asarray(selection))
+        if indices.dtype == bool:
+            if indices.shape != (n,):
+                raise ValueError(
+                    f"The probe mask must have length {n}, got {indices.size}."
+                )
+            indices = np.flatnonzero(indices)
+        elif indices.size and (
+            not np.issubdtype(indices.dtype, np.integer) or indices.ndim != 1
+        ):
+            raise ValueError(f"Invalid probe selection: {selection!r}.")
+    if indices.size == 0:
+        raise ValueError(f"Empty probe selection for {n} probes: {requested!r}.")
+    if np.any((indices < -n) | (indices >= n)):
+        raise IndexError(f"Probe index out of range for {n} probes: {selection!r}.")
+    return np.where(indices < 0, indices + n, indices)
+
+
+def read_probes(dataset, x_idx, y_idx, time_key=None, dtype=None) -> np.ndarray:
+    """Read a selection of probes from an HDF5 dataset with hyperslab reads.
+
+    The probes are the outer product of the chord-wise and span-wise indices,
+    ordered as ``np.ravel`` of an (n_x, n_y) grid. Along each direction, the
+    sorted indices are grouped by chunk of the dataset (or in runs of
+    consecutive indices if it is contiguous), and each pair of groups is read
+    as a single hyperslab, so that only the chunks holding selected probes are
+    read from disk.
+
+    Parameters
+    ----------
+    dataset: h5py.Dataset
+        The dataset, shape (nx, ny), or (n_time, nx, ny) with ``time_key``.
+    x_idx, y_idx: np.ndarray
+        The chord-wise and span-wise indices, see :func:`probe_indices`.
+    time_key: int or slice, optional
+        The time steps to read, for datasets with a time axis.
+    dtype: np.dtype, optional
+        The type of the returned data, converted by HDF5 while reading.
+        Default is the type of the dataset.
+
+    Returns
+    -------
+    data: np.ndarray
+        The data of the probes, shape (n_sensors,), or (n_time, n_sensors)
+        for a slice of time steps.
+    """
+    x_idx, y_idx = np.asarray(x_idx), np.asarray(y_idx)
+    x_sorted, x_inverse = np.unique(x_idx, return_inverse=True)
+    y_sorted, y_inverse = np.unique(y_idx, return_inverse=True)
+    chunks = dataset.chunks[-2:] if dataset.chunks is not None else (None, None)
+
+    lead = ()
+    if time_key is not None:
+        squeeze = isinstance(time_key, (int, np.integer))
+        if squeeze:
+            # A single time step, read as a slice (the step -1 ends at None)
+            time_key = slice(int(time_key), int(time_key) + 1 or None)
+        lead = (time_key,)
+        n_time = len(range(*time_key.indices(dataset.shape[0])))
+    shape = ((n_time,) if lead else ()) + (x_sorted.size, y_sorted.size)
+    data = np.empty(shape, dtype=dtype or dataset.dtype)
+    source = dataset.astype(data.dtype) if data.dtype != dataset.dtype else dataset
+
+    n_bytes = 0
+    x_start = 0
+    for x_group in _hyperslab_groups(x_sorted, chunks[0]):
+        y_start = 0
+        for y_group in _hyperslab_groups(y_sorted, chunks[1]):
+            key = lead + (
+                slice(x_group[0], x_group[-1] + 1),
+                slice(y_group[0], y_group[-1] + 1),
+            )
+            block = source[key]
+            n_bytes += block.nbytes
+            block = block[..., x_group - x_group[0], :][..., y_group - y_group[0]]
+            data[
+                ...,
+                x_start : x_start + x_group.size,
+                y_start : y_start + y_group.size,
+            ] = block
+            y_start += y_group.size
+        x_start += x_group.size
+    profiling.count_bytes(n_bytes)
+
+    # Back to the requested order, with the repeated probes
+    if not np.array_equal(x_sorted, x_idx):
+        data = data[..., x_inverse, :]
+    if not np.array_equal(y_sorted, y_idx):
+        data = data[..., y_inverse]
+    data = data.reshape(data.shape[:-2] + (-1,))
+    if lead and squeeze:
+        data = data[0]
+    return data
+
+
+def _hyperslab_groups(indices, chunk):
+    # Split sorted indices into the groups read as one hyperslab: the indices
+    # in the same chunk, or the runs of consecutive indices without chunking
+    if chunk is None:
+        key = indices - np.arange(indices.size)
+    else:
+        key = indices // chunk
+    return np.split(indices, np.flatnonzero(np.diff(key)) + 1)
+
+
+def data_files(data_path) -> list:
+    """Return the pressure files of a case, see :class:`PressureSlabs`.
+
+    Parameters
+    ----------
+    data_path: str or list of str
+        A path, a glob pattern (e.g. ``'data/run_p_raw_data_*.h5'``) or a list
+        of paths and patterns. The matches of a pattern are sorted in natural
+        order, so that ``_250`` comes before ``_1000``.
+
+    Returns
+    -------
+    paths: list of str
+        The paths of the files, without duplicates.
+    """
+    patterns = [data_path] if isinstance(data_path, (str, os.PathLike)) else data_path
+    paths = []
+    for pattern in map(os.fspath, patterns):
+        if glob.has_magic(pattern):
+            matches = glob.glob(pattern)
+            if not matches:
+                raise FileNotFoundError(f"No pressure file matches {pattern}")
+            paths.extend(sorted(matches, key=_natural_key))
+        else:
+            paths.append(pattern)
+    return list(dict.fromkeys(paths))
+
+
+def _natural_key(path):
+    # Sort key comparing the numbers in a path by value
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", path)]
+
+
+class PressureSlabs:
+    """The DNS pressure of a case, stored in one or several files.
+
+    Long records are often split into time slabs, one file per slab, each with
+    a ``pressure`` dataset of shape (n_time, nx, ny) and the time step ``T_s``.
+    The slabs are put in time order and presented as a single record, without
+    ever stitching them in memory: :meth:`read` fills only the requested time
+    steps, reading the slabs concurrently, and :meth:`iter_blocks` reads the
+    record block by block, across slab boundaries.
+
+    If every file has a ``time`` dataset (the time of each step), the slabs
+    are sorted by their first time and consecutive slabs must follow each
+    other by exactly one time step; a gap or an overlap raises a ValueError.
+    Otherwise the slabs are taken in the order of :func:`data_files` and only
+    their shapes and time steps are checked.
+
+    Parameters
+    ----------
+    data_path: str or list of str
+        The pressure files, see :func:`data_files`.
+    key: str, optional
+        The name of the pressure dataset. Default is 'pressure'.
+    n_workers: int, optional
+        The number of threads reading the slabs. Default is the number of
+        slabs, up to 8.
+    dtype: np.dtype, optional
+        The type of the pressure returned by the reads, converted by HDF5.
+        Default is the type of the files.
+
+    Attributes
+    ----------
+    paths: list of str
+        The files, in time order.
+    offsets: np.ndarray
+        The index of the first time step of each slab in the record, followed
+        by the number of time steps, shape (n_slabs + 1,).
+    n_time_steps: int
+        The number of time steps of the record.
+    spatial_shape: tuple
+        The shape (nx, ny) of the probe grid.
+    dtype: np.dtype
+        The type of the pressure returned by the reads.
+    fs: float
+        The sampling frequency, from the time step of the files.
+
+
+    .. note::
+
+        h5py serializes the calls to the HDF5 library, so the concurrent reads
+        mostly overlap the file system latency and the work done between the
+        calls (the spectral computation, while :meth:`iter_blocks` prefetches
+        the next blocks); decompression is not parallelized.
+    """
+
+    def __init__(
+        self,
+        data_path,
+        key: str = "pressure",
+        n_workers: int | None = None,
+        dtype=None,
+    ):
+        self.key = key
+        paths = data_files(data_path)
+        if not paths:
+            raise ValueError("No pressure file given.")
+        self.n_workers = n_workers or min(len(paths), 8)
+        with ThreadPoolExecutor(self.n_workers) as pool:
+            slabs = list(pool.map(self._slab_info, paths))
+
+        timed = [slab["time"] is not None for slab in slabs]
+        if all(timed):
+            slabs.sort(key=lambda slab: slab["time"][0])
+        elif any(timed):
+            raise ValueError("Either all or none of the pressure files need a time.")
+        for previous, slab in zip(slabs, slabs[1:]):
+            _check_slabs(previous, slab)
+
+        self.paths = [slab["path"] for slab in slabs]
+        self.offsets = np.cumsum([0] + [slab["shape"][0] for slab in slabs])
+        self.n_time_steps = int(self.offsets[-1])
+        self.spatial_shape = slabs[0]["shape"][1:]
+        self.dtype = np.dtype(dtype or np.result_type(*[s["dtype"] for s in slabs]))
+        self.T_s = slabs[0]["T_s"]
+        self.fs = 1.0 / self.T_s  # adimensional time step
+
+    def _slab_info(self, path):
+        with h5py.File(path, "r") as f:
+            dataset = f[self.key]
+            time = None
+            if "time" in f:
+                times = f["time"]
+                if times.size != dataset.shape[0]:
+                    raise ValueError(
+                        f"{path}: 'time' and '{self.key}' differ in length"
+                    )
+                time = (float(np.ravel(times[0])[0]), float(np.ravel(times[-1])[0]))
+            return {
+                "path": path,
+                "shape": dataset.shape,
+                "dtype": dataset.dtype,
+                "T_s": float(f["T_s"][()]),
+                "time": time,
+            }
+
+    @property
+    def nbytes(self) -> int:
+        """The size of the whole record, in bytes."""
+        nx, ny = self.spatial_shape
+        return self.n_time_steps * nx * ny * self.dtype.itemsize
+
+    def read(self, x_idx, y_idx, time_key=slice(None)) -> np.ndarray:
+        """Read time steps of a selection of probes, see :func:`read_probes`.
+
+        Parameters
+        ----------
+        x_idx, y_idx: np.ndarray
+            The chord-wise and span-wise indices, see :func:`probe_indices`.
+        time_key: int or slice, optional
+            The time steps, in the whole record. Default is all of them.
+
+        Returns
+        -------
+        data: np.ndarray
+            The pressure, shape (n_time, n_sensors), or (n_sensors,) for a
+            single time step.
+        """
+        return self._read(x_idx, y_idx, time_key, concurrent=True)
+
+    def iter_blocks(self, x_idx, y_idx, block_size: int, prefetch: int | None = None):
+        """Iterate over the record in blocks of time steps.
+
+        The next blocks are read in background threads while the current one
+        is processed; at most ``prefetch + 1`` blocks are held in memory.
+
+        Parameters
+        ----------
+        x_idx, y_idx: np.ndarray
+            The chord-wise and span-wise indices, see :func:`probe_indices`.
+        block_size: int
+            The number of time steps per block. The last block may be shorter.
+        prefetch: int, optional
+            The number of blocks read ahead. Default is ``n_workers``.
+
+        Yields
+        ------
+        np.ndarray
+            The pressure block, shape (n_block_steps, n_sensors).
+        """
+        prefetch = self.n_workers if prefetch is None else prefetch
+        with ThreadPoolExecutor(max(prefetch, 1)) as pool:
+            pending = deque()
+            for start in range(0, self.n_time_steps, block_size):
+                pending.append(
+                    pool.submit(
+                        self._read, x_idx, y_idx, slice(start, start + block_size)
+                    )
+                )
+                if len(pending) > prefetch:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _read(self, x_idx, y_idx, time_key, concurrent=False):
+        single = isinstance(time_key, (int, np.integer))
+        if single:
+            step = range(self.n_time_steps)[time_key]
+            time_key = slice(step, step + 1)
+        steps = range(self.n_time_steps)[time_key]
+        if steps.step < 0:
+            raise ValueError("Only increasing time steps can be read.")
+
+        n_sensors = np.size(x_idx) * np.size(y_idx)
+        data = np.empty((len(steps), n_sensors), dtype=self.dtype)
+        # The part of the requested steps in each slab
+        parts = []
+        for path, first, end in zip(self.paths, self.offsets, self.offsets[1:]):
+            lo = max(0, -(-(first - steps.start) // steps.step))
+            hi = min(len(steps), max(0, -(-(end - steps.start) // steps.step)))
+            if lo < hi:
+                local = slice(steps[lo] - first, steps[hi - 1] - first + 1, steps.step)
+                parts.append((path, local, lo, hi))
+
+        def read_part(part):
+            path, local, lo, hi = part
+            with h5py.File(path, "r") as f:
+                data[lo:hi] = read_probes(
+                    f[self.key], x_idx, y_idx, time_key=local, dtype=self.dtype
+                )
+
+        if concurrent and len(parts) > 1:
+            with ThreadPoolExecutor(min(self.n_workers, len(parts))) as pool:
+                list(pool.map(read_part, parts))
+        else:
+            for part in parts:
+                read_part(part)
+        return data[0] if single else data
+
+
+def _check_slabs(previous, slab):
+    # Consecutive slabs must have the same grid and time step, and follow each
+    # other by one time step if their time is known
+    if previous["shape"][1:] != slab["shape"][1:]:
+        raise ValueError(
+            f"{slab['path']}: probe grid {slab['shape'][1:]} differs from "
+            f"{previous['shape'][1:]} in {previous['path']}"
+        )
+    T_s = previous["T_s"]
+    if not np.isclose(slab["T_s"], T_s, rtol=1e-9, atol=0):
+        raise ValueError(
+            f"{slab['path']}: time step {slab['T_s']} differs from {T_s} "
+            f"in {previous['path']}"
+        )
+    if slab["time"] is None:
+        return
+    missing = (slab["time"][0] - previous["time"][1]) / T_s - 1
+    if missing > 0.5:
+        raise ValueError(
+            f"Gap of {missing:.0f} time steps between {previous['path']} "
+            f"and {slab['path']}"
+        )
+    if missing < -0.5:
+        raise ValueError(
+            f"Overlap of {-missing:.0f} time steps between {previous['path']} "
+            f"and {slab['path']}"
+        )
+
+
+class PressureView:
+    """Lazy, read-only view of the DNS pressure of a set of probes.
+
+    The view has the same layout as :attr:`InputData.pressure`, i.e. shape
+    (n_sensors, n_time_steps), but no data is read when it is created. Indexing
+    it reads only the requested time steps from the data files and
+    de-normalizes them on access. When the record is a single HDF5 dataset
+    stored contiguously (no chunking, hence no compression), it is accessed
+    through a :class:`numpy.memmap` instead of h5py.
+
+    Parameters
+    ----------
+    path: str, list of str or PressureSlabs
+        The data file, or the time slabs of the record, see
+        :class:`PressureSlabs`.
+    x_idx: int, slice, list or np.array
+        The probe selection in the chord-wise direction, see
+        :func:`probe_indices`.
+    y_idx: int, slice, list or np.array
+        The probe selection in the span-wise direction.
+    scale: float, optional
+        The de-normalization factor applied on access. Default is 1.0.
+    key: str, optional
+        The name of the pressure dataset. Default is 'pressure'.
+    dtype: np.dtype, optional
+        The type of the pressure returned on access. Default is the type of
+        ``path``.
+    """
+
+    def __init__(
+        self, path, x_idx, y_idx, scale: float = 1.0, key="pressure", dtype=None
+    ):
+        if not isinstance(path, PressureSlabs):
+            path = PressureSlabs(path, key=key, dtype=dtype)
+        self.slabs = path
+        self.scale = scale
+        self.dtype = np.dtype(dtype or self.slabs.dtype)
+        nx, ny = self.slabs.spatial_shape
+        self._idx = (probe_indices(x_idx, nx), probe_indices(y_idx, ny))
+        self.shape = (self._idx[0].size * self._idx[1].size, self.slabs.n_time_steps)
+
+        self._memmap = None
+        if len(self.slabs.paths) == 1:
+            with h5py.File(self.slabs.paths[0], "r") as f:
+                dataset = f[self.slabs.key]
+                if dataset.chunks is None:
+                    self._memmap = np.memmap(
+                        self.slabs.paths[0],
+                        mode="r",
+                        dtype=dataset.dtype,
+                        offset=dataset.id.get_offset(),
+                        shape=dataset.shape,
+                    )
+
+    @property
+    def ndim(self) -> int:
+        return 2
+
+    @property
+    def nbytes(self) -> int:
+        """The size of the whole pressure record once read, in bytes."""
+        return self.shape[0] * self.shape[1] * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 2:
+            raise IndexError("PressureView is two-dimensional.")
+        sensor_key = key[0]
+        time_key = key[1] if len(key) == 2 else slice(None)
+        if not isinstance(time_key, (slice, int, np.integer)):
+            raise TypeError("Only integers and slices are supported along time.")
+
+        x_idx, y_idx = self._idx
+        if self._memmap is not None:
+            p = self._memmap[time_key, x_idx[:, None], y_idx[None, :]]
+            p = np.reshape(p, p.shape[:-2] + (-1,))
+            profiling.count_bytes(p.nbytes)
+        else:
+            p = self.slabs.read(x_idx, y_idx, time_key=time_key)
+        if isinstance(time_key, slice):
+            p = p.T  # (sensors, time)
+        # Only the selection is de-normalized, without promoting its type
+        return np.multiply(p[sensor_key], self.scale, dtype=self.dtype)
+
+    def __array__(self, dtype=None, copy=None):
+        p = self[:, :]
+        return p if dtype is None else p.astype(dtype)
+
+
 class InputData:
     """Class to hold input data for the Amiet self-noise model.
     This is the main entry point for the ``amiet_self_noise`` package. This class reads
@@ -119,7 +746,8 @@ class InputData:
             yprobes: null # use all probes in y direction
 
         More information on the configuration file can be found in the :ref:`dedicated
-        page <target-to-input-files>` in the documentation.
+        page <target-to-input-files>` in the documentation. A :class:`ConfigData`
+        already read (see :func:`read_config`) is also accepted.
     normalize: bool, optional
         If True, the data will be de-normalized using the configuration data.
 
@@ -129,21 +757,29 @@ class InputData:
         The configuration data as a :mod:`ConfigData <amiet_self_noise.io_utils.ConfigData>` object.
     pos: np.array
         The positions of the sensors as a numpy array, shape (n_sensors, 3).
-    pressure: np.array
-        The pressure data as a numpy array, shape (n_time_steps, n_sensors).
+    pressure: np.array or PressureView or None
+        The pressure data as a numpy array, shape (n_sensors, n_time_steps).
+        A :class:`PressureView` in lazy mode, None in streaming mode (see
+        :meth:`iter_pressure`).
     fs: float
         The sampling frequency in Hz, derived from the data file.
+    n_time_steps: int
+        The number of time steps of the pressure record.
+    normalize: bool
+        Whether the data has been de-normalized using the configuration data.
 
     """
 
     def __init__(
         self,
-        config_path: str,
+        config_path: str | ConfigData,
         normalize: bool = True,
     ):
+        self.normalize = normalize
         self._read_config(config_path)
         self._read_data(self.config.data_type, normalize=normalize)
 
+    @profiling.instrument()
     def _read_data(self, data_type: str, normalize: bool):
         match data_type:
             case "dns":
@@ -160,48 +796,97 @@ class InputData:
     def _read_config(self, path: str):
         """Read the configuration from a YAML file. Output is an
         :mod:`ConfigData <amiet_self_noise.io_utils.ConfigData>` object."""
-        with open(path, "r") as f:
-            config = yaml.load(f, Loader=yaml.FullLoader)
-
-        config["obs"] = np.array(config["obs"])
-
-        self.config = ConfigData(**config)
+        self.config = path if isinstance(path, ConfigData) else read_config(path)
 
     def _read_dns_data(
         self,
         mesh_path,
         data_path,
         normalize: bool,
-        xprobes: int | None = None,
-        yprobes: int | None = None,
+        xprobes=None,
+        yprobes=None,
     ):
-        x_idx = slice(None) if xprobes is None else xprobes
-        y_idx = slice(None) if yprobes is None else yprobes
-        self.pos = self._read_mesh_file_dns(mesh_path, x_idx, y_idx)
-        self.pressure, self.fs = self._read_pressure_file_dns(data_path, x_idx, y_idx)
+        # Only the metadata of the pressure files is read here
+        self._slabs = PressureSlabs(
+            data_path, n_workers=self.config.io_workers, dtype=self.config.dtype
+        )
+        self.n_time_steps, self.fs = self._slabs.n_time_steps, self._slabs.fs
+        nx, ny = self._slabs.spatial_shape
+        x_idx, y_idx = probe_indices(xprobes, nx), probe_indices(yprobes, ny)
+        self._probe_idx = (x_idx, y_idx)
+        self._p_scale = self.config.p_dyn if normalize else 1.0
+        self._pos_scale = 2 * self.config.b if normalize else 1.0
+        if self.config.lazy:
+            self._pos = None  # read on first access
+            self.pressure = PressureView(
+                self._slabs, x_idx, y_idx, scale=self._p_scale
+            )
+        elif self.config.streaming:
+            self.pos = self._read_mesh_file_dns(mesh_path, x_idx, y_idx)
+            self.pressure = None
+        else:
+            self.pos = self._read_mesh_file_dns(mesh_path, x_idx, y_idx)
+            self.pressure = self._slabs.read(x_idx, y_idx).T
         if normalize:
-            # de-normalize
-            self.pressure *= self.config.p_dyn
+            # de-normalize, in place to keep the precision of the pressure
+            if isinstance(self.pressure, np.ndarray):
+                self.pressure *= self.config.p_dyn
+            if self._pos is not None:
+                self.pos *= 2 * self.config.b
             self.fs /= self.config.time_scale
-            self.pos *= 2 * self.config.b
 
-    def _read_mesh_file_dns(self, path: str, x_idx, y_idx) -> Tuple[np.array, np.array]:
-        """Read the mesh file and return the x and y coordinates as numpy arrays."""
-        with h5py.File(path, "r") as f:
-            x = f["x"][x_idx, y_idx]
-            y = f["y"][x_idx, y_idx]
-            z = f["z"][x_idx, y_idx]
-        return np.array([x, y, z]).T
-
-    def _read_pressure_file_dns(
-        self, path: str, x_idx, y_idx
-    ) -> Tuple[np.array, np.array]:
+    @property
+    def pos(self) -> np.array:
+        """The positions of the sensors, shape (n_sensors, 3). In lazy mode the
+        mesh file is read on first access."""
+        if self._pos is None:
+            x_idx, y_idx = self._probe_idx
+            pos = self._read_mesh_file_dns(self.config.mesh_path, x_idx, y_idx)
+            self._pos = pos * self._pos_scale
+        return self._pos
+
+    @pos.setter
+    def pos(self, value: np.array):
+        self._pos = value
+
+    def _read_mesh_file_dns(self, path: str, x_idx, y_idx) -> np.array:
+        """Read the mesh file and return the sensor positions, shape (n_sensors, 3)."""
         with h5py.File(path, "r") as f:
-            p = f["pressure"][:, x_idx, y_idx]
-            p_avg = f["pressure_mean"][x_idx, y_idx]
-            fs = 1.0 / f["T_s"][()]  # adimensional time step
+            x = read_probes(f["x"], x_idx, y_idx)
+            y = read_probes(f["y"], x_idx, y_idx)
+            z = read_probes(f["z"], x_idx, y_idx)
+        return np.stack([x, y, z], axis=-1)
+
+    def iter_pressure(self, block_size: int):
+        """Iterate over the pressure record in blocks of time steps.
 
-        return p.T, fs
+        In streaming and lazy modes the blocks are read from the data files
+        (across the time slabs, see :class:`PressureSlabs`), the next blocks
+        being read ahead in background threads, so that only a few blocks of
+        ``block_size`` time steps are held in memory; otherwise they are views
+        of :attr:`pressure`. The pressure is de-normalized as in
+        :attr:`pressure`, with the type set by the ``precision`` of the
+        configuration.
+
+        Parameters
+        ----------
+        block_size: int
+            The number of time steps per block. The last block may be shorter.
+
+        Yields
+        ------
+        np.array
+            The pressure block, shape (n_sensors, n_block_steps).
+        """
+        if isinstance(self.pressure, np.ndarray):
+            for start in range(0, self.n_time_steps, block_size):
+                yield self.pressure[:, start : start + block_size]
+            return
+
+        x_idx, y_idx = self._probe_idx
+        for p in self._slabs.iter_blocks(x_idx, y_idx, block_size):
+            p *= self._p_scale
+            yield p.T
 
     def print_summary(self, console: Console = None) -> None:
         """Print a detailed summary of the InputData configuration and loaded data.
@@ -249,9 +934,27 @@ class InputData:
         console.print(geometry_panel)
 
         # Data section
-        if hasattr(self, "pressure") and hasattr(self, "pos"):
+        if hasattr(self, "pressure") and (self.config.lazy or self.config.streaming):
+            if self.pressure is None:
+                nsensors, source = self.pos.shape[0], "streamed from the data file"
+            else:
+                nsensors, source = self.pressure.shape[0], "read on access"
+            nt = self.n_time_steps
+            data_panel = Panel(
+                f"  Time steps:           [cyan]{nt:,}[/cyan]\n"
+                f"  Sensors:              [cyan]{nsensors}[/cyan]\n"
+                f"  Sampling frequency:   [cyan]{self.fs:.0f} Hz[/cyan]\n"
+                f"  Duration:             [cyan]{nt / self.fs:.3f} s[/cyan]\n"
+                f"  Time resolution:      [cyan]{1 / self.fs * 1000:.2f} ms[/cyan]\n"
+                f"  Pressure:             [cyan]{source}[/cyan]",
+                title=f"[bold]Data Summary ({self.config.data_type.upper()})[/bold]",
+                title_align="left",
+                highlight=True,
+            )
+            console.print(data_panel)
+        elif hasattr(self, "pressure") and hasattr(self, "pos"):
             # Time series info
-            nt, nsensors = self.pressure.shape
+            nsensors, nt = self.pressure.shape
             duration = nt / self.fs
 
             # Pressure statistics
@@ -303,7 +1006,17 @@ class InputData:
                     f"Mesh file: [green]{self.config.mesh_path}[/green]\n"
                 )
             if hasattr(self.config, "data_path") and self.config.data_path:
-                file_string.append(f"Data file: [green]{self.config.data_path}[/green]")
+                paths = getattr(self, "_slabs", None)
+                if paths is not None and len(paths.paths) > 1:
+                    file_string.append(
+                        f"Data files: [cyan]{len(paths.paths)}[/cyan] time slabs, "
+                        f"[green]{paths.paths[0]}[/green] to "
+                        f"[green]{paths.paths[-1]}[/green]"
+                    )
+                else:
+                    file_string.append(
+                        f"Data file: [green]{self.config.data_path}[/green]"
+                    )
             file_panel = Panel(
                 "".join(file_string),
                 title="[bold]File Paths[/bold]",
@@ -336,9 +1049,182 @@ class InputData:
                 highlight=True,
             )
             console.print(probe_panel)
+
+        # Profiling, if any stage was recorded (see amiet_self_noise.profiling)
+        if profiling.profiler.stages:
+            console.print(profiling.profiler.panel())
         console.print("")  # Extra line at end
 
 
+def read_config(path: str) -> ConfigData:
+    """Read a configuration file without reading the data it points to.
+
+    Parameters
+    ----------
+    path: str
+        The path to the YAML configuration file.
+
+    Returns
+    -------
+    config: ConfigData
+        The configuration.
+    """
+    with open(path, "r") as f:
+        config = yaml.load(f, Loader=yaml.FullLoader)
+
+    config["obs"] = np.array(config["obs"])
+
+    return ConfigData(**config)
+
+
+def write_results(
+    path: str,
+    f: np.array,
+    psd: np.array,
+    config: ConfigData,
+    phi_pp: np.array = None,
+    ly: np.array = None,
+    radiation: np.array = None,
+    obs: np.array = None,
+    compression: str | None = "gzip",
+) -> None:
+    """Write the results of the Amiet model to a compressed HDF5 file.
+
+    The arrays are stored in chunks of frequencies and observers, so that
+    :func:`read_results` can read a band of frequencies or a few observers
+    without reading the whole file. The configuration is stored as JSON in the
+    ``config`` attribute, with the resolved speed of sound and Mach number as
+    separate attributes. The file is written to a temporary file first, so
+    that an interrupted write never leaves a partial file at ``path``.
+
+    Parameters
+    ----------
+    path: str
+        The path to the results file.
+    f: np.array
+        Frequencies in Hz, shape (n_freq,).
+    psd: np.array
+        Far-field power spectral density, shape (n_freq, n_obs).
+    config: ConfigData
+        The configuration of the run.
+    phi_pp: np.array, optional
+        Wall pressure spectrum, shape (n_freq,).
+    ly: np.array, optional
+        Spanwise coherence length, shape (n_freq,).
+    radiation: np.array, optional
+        Squared modulus of the radiation integral, shape (n_freq, n_obs).
+    obs: np.array, optional
+        Observer positions, shape (n_obs, 3). Default is ``config.obs``.
+    compression: str, optional
+        The HDF5 compression filter. Default is 'gzip'.
+    """
+    obs = config.obs if obs is None else obs
+    n_freq, n_obs = psd.shape
+    # About 64 KB per chunk of a (n_freq, n_obs) array
+    chunks = (min(n_freq, 512), min(n_obs, 16))
+    tmp_path = path + ".tmp"
+    with h5py.File(tmp_path, "w") as h5:
+        h5.create_dataset("f", data=f)
+        h5.create_dataset("obs", data=obs)
+        for name, value in [("psd", psd), ("radiation", radiation)]:
+            if value is not None:
+                h5.create_dataset(
+                    name,
+                    data=value,
+                    chunks=chunks,
+                    compression=compression,
+                    shuffle=compression is not None,
+                )
+        for name, value in [("phi_pp", phi_pp), ("ly", ly)]:
+            if value is not None:
+                h5.create_dataset(name, data=value)
+        h5.attrs["config"] = json.dumps(_config_to_dict(config))
+        h5.attrs["c0"] = config.c0
+        h5.attrs["M0"] = config.M0
+    os.replace(tmp_path, path)
+
+
+def read_results(path: str, obs=None, f_band: tuple | None = None) -> PSDResults:
+    """Read results written by :func:`write_results`, in whole or in part.
+
+    Only the requested observers and frequency band are read from the file.
+
+    Parameters
+    ----------
+    path: str
+        The path to the results file.
+    obs: int, slice or list of int, optional
+        The indices of the observers to read. Default is all the observers.
+    f_band: tuple, optional
+        The band of frequencies ``(f_min, f_max)`` to read, in Hz, bounds
+        included. Default is all the frequencies.
+
+    Returns
+    -------
+    results: PSDResults
+        The results. The arrays are restricted to the selection; ``phi_pp``,
+        ``ly`` and ``radiation`` are None if they were not written.
+    """
+    with h5py.File(path, "r") as h5:
+        f = h5["f"][:]
+        rows = slice(None)
+        if f_band is not None:
+            start = np.searchsorted(f, f_band[0])
+            stop = np.searchsorted(f, f_band[1], side="right")
+            rows = slice(start, stop)
+        observers = h5["obs"][:]
+        cols = slice(None) if obs is None else obs
+        if not isinstance(cols, slice):
+            cols = np.arange(observers.shape[0])[cols]
+
+        results = PSDResults(
+            f=f[rows],
+            psd=_read_block(h5["psd"], rows, cols),
+            obs=observers[cols],
+            config=_config_from_dict(json.loads(h5.attrs["config"])),
+        )
+        for name in ["phi_pp", "ly"]:
+            if name in h5:
+                setattr(results, name, h5[name][rows])
+        if "radiation" in h5:
+            results.radiation = _read_block(h5["radiation"], rows, cols)
+    return results
+
+
+def _read_block(dataset, rows, cols):
+    # Read the hyperslab (rows, cols) of a (n_freq, n_obs) dataset. h5py only
+    # reads increasing indices, so index arrays are sorted and restored after
+    if isinstance(cols, slice):
+        block = dataset[rows, cols]
+        profiling.count_bytes(block.nbytes)
+        return block
+    unique, inverse = np.unique(np.atleast_1d(cols), return_inverse=True)
+    block = dataset[rows, list(unique)]
+    profiling.count_bytes(block.nbytes)  # before repeated observers are copied
+    block = block[:, inverse.ravel()]
+    if np.ndim(cols) == 0:
+        block = block[:, 0]
+    return block
+
+
+def _config_to_dict(config):
+    # The init fields of a ConfigData, JSON serializable
+    values = {}
+    for item in fields(config):
+        if item.init:
+            value = getattr(config, item.name)
+            if isinstance(value, np.ndarray):
+                value = value.tolist()
+            values[item.name] = value
+    return values
+
+
+def _config_from_dict(values):
+    values = dict(values)
+    values["obs"] = np.array(values["obs"])
+    return ConfigData(**values)
+
+
 def read_pressure_data(
     path: str, pressure_key: str = "pressure", time_key: str = "time"
 ) -> Tuple[np.array, np.array]:
@@ -0,0 +1,193 @@
+import numpy as np
+
+from amiet_self_noise import preproc, profiling
+from amiet_self_noise.amiet_model import far_field_transfer
+
+
+class OnlineEstimator:
+    """Far-field PSD of a pressure record that grows while it is estimated.
+
+    The pressure is pushed block by block, e.g. as a coupled solver produces
+    it, into the Welch accumulator of the model (see
+    :meth:`AmietModel.welch_accumulator
+    <amiet_self_noise.amiet_model.AmietModel.welch_accumulator>`), which
+    carries the overlap of the segments between blocks. The current estimate
+    of the spectra, of the wall-pressure statistics and of the far-field PSD
+    is available at any time: the radiation integral does not depend on the
+    pressure, so it is evaluated once and only the source term is updated.
+
+    Parameters
+    ----------
+    model : AmietModel
+        The model of the case. Only the configuration, the sensor positions
+        and the sampling frequency of its input data are used, e.g. from an
+        :class:`InputData <amiet_self_noise.io_utils.InputData>` in lazy mode.
+        Its :attr:`spectra <amiet_self_noise.amiet_model.AmietModel.spectra>`
+        follow the estimate, so that its other methods
+        (:meth:`evaluate_at`, :meth:`compute_band_psd`, ...) use the record
+        pushed so far.
+    nperseg : int, optional
+        Length of the Welch segments. Default is ``config.nperseg``, which is
+        then required since the length of the record is not known.
+    obs : array_like, optional
+        Observer positions [x, y, z] in meters, shape (n_obs, 3). Default is
+        the observers of the configuration.
+    chunk_size : int, optional
+        Maximum number of observers in a single broadcasted evaluation of the
+        radiation integral. Default is 128.
+
+    Attributes
+    ----------
+    accumulator : WelchAccumulator
+        The accumulated spectra of the sensors.
+    history : list of tuple
+        The number of segments and the band power, shape (n_bands, n_obs),
+        of the estimates taken by :meth:`convergence`.
+
+
+    .. note::
+
+        The convergence of a band is measured by the change of its level, in
+        dB, since the estimate at half the current number of segments, the
+        largest over the observers. The statistical error of a Welch average
+        decreases like :math:`1/\\sqrt{n_{segments}}`, so this change is of
+        the order of that error once the band has converged, and much larger
+        while a drift of the flow is still visible in the spectrum.
+    """
+
+    def __init__(self, model, nperseg: int | None = None, obs=None, chunk_size=128):
+        config = model.input_data.config
+        nperseg = nperseg or config.nperseg
+        if nperseg is None:
+            raise ValueError("The segment length (nperseg) is required online.")
+        self.model = model
+        self.obs = np.atleast_2d(config.obs if obs is None else obs).astype(float)
+        self.chunk_size = chunk_size
+        self.accumulator = model.welch_accumulator(nperseg)
+        self.history = []
+        self._transfer = None
+
+    @property
+    def n_segments(self) -> int:
+        """The number of Welch segments accumulated so far."""
+        return self.accumulator.n_segments
+
+    def update(self, block: np.ndarray) -> int:
+        """Push a block of pressure samples.
+
+        Parameters
+        ----------
+        block : np.ndarray
+            The pressure of the sensors in Pa, shape (n_sensors, n_t_block),
+            following in time the previous block (as the blocks of
+            :meth:`InputData.iter_pressure
+            <amiet_self_noise.io_utils.InputData.iter_pressure>`).
+
+        Returns
+        -------
+        int
+            The number of segments completed by this block.
+        """
+        n_new = self.accumulator.update(block)
+        if n_new:
+            # The statistics of the model are out of date
+            self.model.spectra = None
+            self.model._statistics = None
+        return n_new
+
+    def feed(self, blocks, every: int = 1):
+        """Push blocks of pressure and yield the estimate as it improves.
+
+        Parameters
+        ----------
+        blocks : iterable of np.ndarray
+            The pressure blocks, see :meth:`update`.
+        every : int, optional
+            The number of new segments between two estimates. Default is 1.
+
+        Yields
+        ------
+        f : ndarray
+            Frequency array in Hz, shape (n_freq,).
+        psd : ndarray
+            The current far-field PSD in Pa²/Hz, shape (n_freq, n_obs).
+        """
+        last = self.n_segments
+        for block in blocks:
+            self.update(block)
+            if self.n_segments >= max(last + every, 1):
+                last = self.n_segments
+                yield self.psd()
+
+    @profiling.instrument()
+    def psd(self):
+        """Return the far-field PSD of the record pushed so far.
+
+        Returns
+        -------
+        f : ndarray
+            Frequency array in Hz, shape (n_freq,).
+        psd : ndarray
+            Power spectral density in Pa²/Hz, shape (n_freq, n_obs).
+        """
+        model = self.model
+        if model.spectra is None:
+            model.spectra = self.accumulator.result()
+        f, phi_pp, ly = model.statistics()
+        if self._transfer is None:
+            self._transfer = far_field_transfer(
+                f,
+                self.obs,
+                model.input_data.config,
+                kernel=model.frequency_kernel(f),
+                chunk_size=self.chunk_size,
+            )
+        L = model.input_data.config.L
+        return f, self._transfer * (2 * L * phi_pp * ly)[:, None]
+
+    def convergence(self, fraction: int = 3, f_band: tuple | None = None):
+        """Return the convergence of the PSD in fractional-octave bands.
+
+        The current estimate is added to :attr:`history`, and compared with
+        the latest estimate of the history taken with at most half the
+        current number of segments.
+
+        Parameters
+        ----------
+        fraction : int, optional
+            Number of bands per octave. Default is 3.
+        f_band : tuple, optional
+            Range (f_min, f_max) of the band centres in Hz. Default is the
+            whole frequency range of the spectra.
+
+        Returns
+        -------
+        f_center : ndarray
+            Band centres in Hz, shape (n_bands,).
+        change : ndarray
+            The largest change of the band levels over the observers, in dB,
+            shape (n_bands,). It is infinite until an estimate with at most
+            half the segments is available.
+        """
+        f, psd = self.psd()
+        df = f[1] - f[0]
+        if f_band is None:
+            f_band = (f[1], f[-1])
+        center, lower, upper = preproc.fractional_octave_bands(
+            max(f_band[0], df), min(f_band[1], f[-1]), fraction, df=df
+        )
+        power = preproc.band_power(f, psd, lower, upper)
+
+        change = np.full(center.size, np.inf)
+        earlier = [
+            (n, p)
+            for n, p in self.history
+            if 2 * n <= self.n_segments and p.shape == power.shape
+        ]
+        if earlier:
+            reference = earlier[-1][1]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                level = 10 * np.abs(np.log10(power / reference))
+            change = np.nanmax(level, axis=1)
+        self.history.append((self.n_segments, power))
+        return center, change
@@ -0,0 +1,305 @@
+import dataclasses
+import functools
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import numpy as np
+from rich.panel import Panel
+from rich.table import Table
+
+
+@dataclass
+class StageStats:
+    """Measurements accumulated over all the calls of a stage.
+
+    Parameters
+    ----------
+    name: str
+        The name of the stage.
+    calls: int
+        The number of calls.
+    duration: float
+        The total wall time, in seconds.
+    bytes_read: int
+        The number of bytes read from the data files during the stage.
+    output_bytes: int
+        The total size of the arrays returned by the stage, in bytes.
+    peak_memory: int or None
+        The largest amount of memory allocated during a call, above what was
+        allocated when it started, in bytes. Only measured when the memory is
+        traced, None otherwise.
+    """
+
+    name: str
+    calls: int = 0
+    duration: float = 0.0
+    bytes_read: int = 0
+    output_bytes: int = 0
+    peak_memory: int | None = None
+
+
+class Profiler:
+    """Records the time, I/O and memory of the stages of a computation.
+
+    Stages are delimited by :meth:`stage` or by functions decorated with
+    :func:`instrument`. Nested stages are measured independently, e.g. the
+    bytes read while computing the spectra are counted both in
+    ``AmietModel.compute_spectra`` and in ``AmietModel.compute_wps``.
+
+    When the profiler is disabled (the default), instrumented functions are
+    called directly, without any measurement.
+
+    Attributes
+    ----------
+    enabled: bool
+        Whether the stages are recorded.
+    trace_memory: bool
+        Whether the peak memory of the stages is measured, with
+        :mod:`tracemalloc`. Tracing slows down allocations, so that the
+        durations are less accurate.
+    stages: dict
+        The :class:`StageStats` of the recorded stages, by name, in the order
+        in which they were first entered.
+
+
+    .. note::
+
+        The profiler is meant to be used from a single thread: stages entered
+        concurrently from several threads are not separated.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.stages = {}
+        self._stack = []
+        self._started_tracing = False
+
+    def enable(self, trace_memory: bool = False) -> None:
+        """Start recording the stages."""
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def disable(self) -> None:
+        """Stop recording the stages. The measurements are kept."""
+        self.enabled = False
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self.trace_memory = False
+
+    def reset(self) -> None:
+        """Discard the measurements."""
+        self.stages = {}
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """Context manager recording a stage.
+
+        Parameters
+        ----------
+        name: str
+            The name of the stage. The measurements of stages with the same
+            name are accumulated.
+
+        Yields
+        ------
+        StageStats or None
+            The statistics of the stage, or None if the profiler is disabled.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        stats = self.stages.setdefault(name, StageStats(name))
+        frame = {"stats": stats, "start_memory": 0, "peak": 0}
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # The peak of the enclosing stages must survive the reset below
+            for parent in self._stack:
+                parent["peak"] = max(parent["peak"], peak)
+            tracemalloc.reset_peak()
+            frame["start_memory"] = frame["peak"] = current
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.duration += time.perf_counter() - start
+            stats.calls += 1
+            self._stack.pop()
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, frame["peak"])
+                for parent in self._stack:
+                    parent["peak"] = max(parent["peak"], peak)
+                stats.peak_memory = max(
+                    stats.peak_memory or 0, peak - frame["start_memory"]
+                )
+
+    def count_bytes(self, n_bytes: int) -> None:
+        """Add ``n_bytes`` read from a data file to the active stages."""
+        for stats in {id(f["stats"]): f["stats"] for f in self._stack}.values():
+            stats.bytes_read += n_bytes
+
+    def report(self) -> list:
+        """Return the measurements of the stages, as a list of dicts."""
+        return [dataclasses.asdict(stats) for stats in self.stages.values()]
+
+    def panel(self) -> Panel:
+        """Return the measurements as a :class:`rich.panel.Panel`."""
+        table = Table(box=None, pad_edge=False)
+        columns = ["Stage", "Calls", "Time", "Read", "Output"]
+        if any(stats.peak_memory is not None for stats in self.stages.values()):
+            columns.append("Peak")
+        table.add_column(columns[0], no_wrap=True)
+        for column in columns[1:]:
+            table.add_column(column, justify="right")
+        for stats in self.stages.values():
+            row = [
+                stats.name,
+                f"[cyan]{stats.calls}[/cyan]",
+                f"[cyan]{_format_time(stats.duration)}[/cyan]",
+                f"[cyan]{_format_bytes(stats.bytes_read)}[/cyan]",
+                f"[cyan]{_format_bytes(stats.output_bytes)}[/cyan]",
+            ]
+            if len(columns) == 6:
+                peak = stats.peak_memory
+                row.append("-" if peak is None else f"[red]{_format_bytes(peak)}[/red]")
+            table.add_row(*row)
+        return Panel(
+            table, title="[bold]Profiling[/bold]", title_align="left", highlight=True
+        )
+
+
+profiler = Profiler()
+"""The profiler used by the instrumented functions of the package."""
+
+
+def enable(trace_memory: bool = False) -> None:
+    """Enable the package :data:`profiler`, see :meth:`Profiler.enable`."""
+    profiler.enable(trace_memory=trace_memory)
+
+
+def disable() -> None:
+    """Disable the package :data:`profiler`, see :meth:`Profiler.disable`."""
+    profiler.disable()
+
+
+def stage(name: str):
+    """Record a stage with the package :data:`profiler`, see
+    :meth:`Profiler.stage`."""
+    return profiler.stage(name)
+
+
+def count_bytes(n_bytes: int) -> None:
+    """Count bytes read from a data file, if the profiler is enabled."""
+    if profiler.enabled:
+        profiler.count_bytes(n_bytes)
+
+
+@contextmanager
+def profile(trace_memory: bool = False, reset: bool = True):
+    """
+    Context manager profiling the package during a block of code.
+
+    Parameters
+    ----------
+    trace_memory : bool, optional
+        If True, the peak memory of the stages is measured. Default is False.
+    reset : bool, optional
+        If True, the previous measurements are discarded. Default is True.
+
+    Yields
+    ------
+    Profiler
+        The package :data:`profiler`, whose :meth:`report <Profiler.report>`
+        holds the measurements.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+        with asn.profiling.profile(trace_memory=True) as profiler:
+            input_data = asn.io_utils.InputData("config.yaml")
+            f, psd = asn.amiet_model.AmietModel(input_data).compute_psd()
+        input_data.print_summary()  # includes a profiling panel
+        report = profiler.report()
+    """
+    was_enabled, was_tracing = profiler.enabled, profiler.trace_memory
+    if reset:
+        profiler.reset()
+    profiler.enable(trace_memory=trace_memory)
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if was_enabled:
+            profiler.enable(trace_memory=was_tracing)
+
+
+def instrument(name: str | None = None):
+    """
+    Decorator recording each call of a function as a stage.
+
+    The size of the arrays returned by the function is added to the
+    ``output_bytes`` of the stage.
+
+    Parameters
+    ----------
+    name : str, optional
+        The name of the stage. Default is the qualified name of the function,
+        e.g. ``'AmietModel.compute_psd'``.
+    """
+
+    def decorator(func):
+        stage_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.stage(stage_name) as stats:
+                result = func(*args, **kwargs)
+                stats.output_bytes += _nbytes(result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _nbytes(value) -> int:
+    # Total size of the arrays in a result (arrays, tuples or dataclasses)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(item) for item in value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return sum(_nbytes(getattr(value, f.name)) for f in dataclasses.fields(value))
+    return 0
+
+
+def _format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+
+def _format_bytes(n_bytes: int) -> str:
+    if n_bytes < 1024:
+        return f"{n_bytes} B"
+    if n_bytes < 1024**2:
+        return f"{n_bytes / 1024:.1f} KB"
+    if n_bytes < 1024**3:
+        return f"{n_bytes / 1024**2:.1f} MB"
+    return f"{n_bytes / 1024**3:.1f} GB"
@@ -1,9 +1,18 @@
+import functools
+import threading
+from dataclasses import dataclass
+
 import numpy as np
 from scipy.special import fresnel
 
+from amiet_self_noise import profiling
+
 
-def _E_etoile(x):
+def _E_etoile(x, tol=None):
     # Implementation compatible avec la convention utilisée E^*(x). Pour x <= 0 on remplace par une valeur positive.
+    # Si tol est donné, on utilise la table d'interpolation (voir FresnelTable)
+    if tol is not None:
+        return _fresnel_table(tol)(x)
     x = np.asarray(x, dtype=np.float64)  # évite racine de négatif / zéro
     xpos = np.maximum(x, 1e-12)
     arg = np.sqrt(2.0 * xpos / np.pi)
@@ -12,13 +21,279 @@ def _E_etoile(x):
     return C - 1j * S
 
 
+class FresnelTable:
+    """Tabulated :math:`E^\\star` function with a controlled error.
+
+    :math:`E^\\star(x) = C(t) - iS(t)` with :math:`t = \\sqrt{2x/\\pi}`, where
+    :math:`C` and :math:`S` are the Fresnel integrals. Below ``x_max``,
+    :math:`E^\\star` is interpolated by cubic Hermite polynomials on a uniform
+    grid of :math:`t`, using the exact derivative
+    :math:`dE^\\star/dt = e^{-i\\pi t^2/2}`. The grid is refined until the
+    interpolation error, measured against :func:`scipy.special.fresnel` at the
+    middle of every interval (where the error of a cubic Hermite interpolant
+    is the largest), is below ``tol``. Above ``x_max``, the asymptotic
+    expansion of the auxiliary functions :math:`f` and :math:`g` of the
+    Fresnel integrals is used, with as many terms as ``tol`` requires:
+
+    .. math::
+
+        E^\\star(x) = \\frac{1 - i}{2} + i\\,(f(t) + i g(t))\\,e^{-ix}
+
+    Parameters
+    ----------
+    tol: float, optional
+        The maximum absolute error on :math:`E^\\star`. Default is 1e-10.
+    x_max: float, optional
+        The end of the tabulated range. Default is 400, i.e. :math:`t \\le 16`.
+
+    Attributes
+    ----------
+    max_error: float
+        The largest error measured when the table was built.
+    n_intervals: int
+        The number of intervals of the table.
+    n_terms: int
+        The number of terms of the asymptotic expansion.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+        table = FresnelTable(tol=1e-8)
+        E = table(np.linspace(0, 1000, 10_000))
+        assert table.reference_error() <= 1e-8
+    """
+
+    _BLOCK_SIZE = 1 << 15  # taille des blocs, pour rester dans le cache
+
+    def __init__(self, tol: float = 1e-10, x_max: float = 400.0):
+        if tol <= 0:
+            raise ValueError("The tolerance must be positive.")
+        self.tol = tol
+        self.x_max = x_max
+        self.t_max = np.sqrt(2.0 * x_max / np.pi)
+
+        # Nombre de termes du développement asymptotique au-delà de x_max
+        self.n_terms = 1
+        while self._asymptotic_error(self.t_max, self.n_terms) > tol / 2:
+            self.n_terms += 1
+            if self.n_terms > 12:
+                raise ValueError(
+                    f"The asymptotic expansion is not accurate to {tol} above "
+                    f"x_max={x_max}, increase x_max."
+                )
+
+        # On raffine la grille jusqu'à ce que l'erreur au milieu des
+        # intervalles soit inférieure à la moitié de la tolérance
+        n = 64
+        while True:
+            t = np.linspace(0.0, self.t_max, n + 1)
+            self.h = self.t_max / n
+            coefs = self._hermite_coefficients(t)
+            # Parties réelles puis imaginaires des 4 coefficients, shape (8, n)
+            self._table = np.ascontiguousarray(
+                np.concatenate([coefs.real, coefs.imag], axis=1).T
+            )
+            middle = t[:-1] + self.h / 2
+            self.max_error = float(
+                np.max(np.abs(self._interpolate(middle) - _E_exact(middle)))
+            )
+            if self.max_error <= tol / 2:
+                break
+            n *= 2
+        self.n_intervals = n
+
+    @staticmethod
+    def _hermite_coefficients(t):
+        # Coefficients du polynôme de Hermite de chaque intervalle, en fonction
+        # de w = (t - t_i)/h, shape (n, 4)
+        h = t[1] - t[0]
+        E = _E_exact(t)
+        dE = h * np.exp(-0.5j * np.pi * t**2)
+        a0 = E[:-1]
+        a1 = dE[:-1]
+        a2 = 3.0 * (E[1:] - E[:-1]) - 2.0 * dE[:-1] - dE[1:]
+        a3 = 2.0 * (E[:-1] - E[1:]) + dE[:-1] + dE[1:]
+        return np.stack([a0, a1, a2, a3], axis=-1)
+
+    def _interpolate(self, t):
+        # Schéma de Horner en place, sur les parties réelle et imaginaire
+        w = t / self.h
+        i = w.astype(np.intp)
+        np.minimum(i, self._table.shape[1] - 1, out=i)
+        w -= i
+        out = np.empty(t.shape + (2,))
+        for part in (0, 1):
+            a = self._table[4 * part : 4 * part + 4]
+            y = a[3][i]
+            for k in (2, 1, 0):
+                y *= w
+                y += a[k][i]
+            out[..., part] = y
+        return out.view(np.complex128)[..., 0]
+
+    @staticmethod
+    def _auxiliary(t, n_terms):
+        # Développement asymptotique des fonctions auxiliaires f et g
+        z = 1.0 / (np.pi * t**2) ** 2
+        f = np.ones_like(t)
+        g = np.ones_like(t)
+        a = b = 1.0
+        zm = np.ones_like(t)
+        for m in range(1, n_terms):
+            a *= (4 * m - 3) * (4 * m - 1)
+            b *= (4 * m - 1) * (4 * m + 1)
+            zm *= z
+            f += (-1) ** m * a * zm
+            g += (-1) ** m * b * zm
+        return f / (np.pi * t), g / (np.pi**2 * t**3)
+
+    @classmethod
+    def _asymptotic(cls, x, t, n_terms):
+        f, g = cls._auxiliary(t, n_terms)
+        return (0.5 - 0.5j) + 1j * (f + 1j * g) * np.exp(-1j * x)
+
+    @classmethod
+    def _asymptotic_error(cls, t_max, n_terms):
+        t = np.linspace(t_max, 4 * t_max, 1000)
+        E = cls._asymptotic(np.pi * t**2 / 2, t, n_terms)
+        return np.max(np.abs(E - _E_exact(t)))
+
+    def __call__(self, x):
+        """Evaluate :math:`E^\\star(x)`, with the same convention as the exact
+        implementation for :math:`x \\le 0`."""
+        x = np.maximum(np.asarray(x, dtype=np.float64), 1e-12)
+        shape = x.shape
+        x = x.ravel()
+        E = np.empty(x.shape, dtype=np.complex128)
+        # Évaluation par blocs, pour que les temporaires restent dans le cache
+        for start in range(0, x.size, self._BLOCK_SIZE):
+            xb = x[start : start + self._BLOCK_SIZE]
+            t = np.sqrt(xb * (2.0 / np.pi))
+            large = t > self.t_max
+            Eb = self._interpolate(np.minimum(t, self.t_max))
+            if large.any():
+                Eb[large] = self._asymptotic(xb[large], t[large], self.n_terms)
+            E[start : start + self._BLOCK_SIZE] = Eb
+        return E.reshape(shape)
+
+    def reference_error(self, x=None) -> float:
+        """Return the largest error of the table against
+        :func:`scipy.special.fresnel`.
+
+        Parameters
+        ----------
+        x: array_like, optional
+            The arguments of :math:`E^\\star` at which the table is compared.
+            Default is a dense sampling of :math:`[0, 4 x_{max}]`, with points
+            between the grid nodes.
+
+        Returns
+        -------
+        error: float
+            The largest absolute error.
+        """
+        if x is None:
+            t = np.linspace(0.0, 2 * self.t_max, 8 * self.n_intervals + 7)
+            x = np.pi * t**2 / 2
+        return float(np.max(np.abs(self(x) - _E_etoile(x))))
+
+
+def _E_exact(t):
+    # E* en fonction de t = sqrt(2x/pi), calcul direct
+    S, C = fresnel(t)
+    return C - 1j * S
+
+
+@functools.lru_cache(maxsize=8)
+def _fresnel_table(tol):
+    return FresnelTable(tol)
+
+
+@dataclass
+class FrequencyKernel:
+    """Observer-independent terms of the radiation integral.
+
+    These terms only depend on the frequency and on the flow (:math:`U_0`,
+    :math:`c_0`, :math:`M_0`, :math:`b` and :math:`\\alpha`), so they are
+    computed once by :func:`compute_frequency_kernel` and reused for any
+    number of observers by :func:`evaluate_radiation_integral`.
+
+    All the terms have shape (n_nonzero,): they are only defined at the
+    non-zero angular frequencies selected by ``nonzero``.
+
+    Parameters
+    ----------
+    omega: np.array
+        Angular frequencies in rad/s, shape (n_freq,).
+    nonzero: np.array
+        Boolean mask of the non-zero frequencies, shape (n_freq,).
+    U0: float
+        Free-stream velocity in m/s.
+    c0: float
+        Speed of sound in m/s.
+    M0: float
+        Free-stream Mach number.
+    b: float
+        Airfoil semi-chord in m.
+    alpha: float
+        Convection velocity ratio :math:`U_c/U_0`.
+    mu: np.array
+        Reduced acoustic wavenumber :math:`\\mu = kb/\\beta^2`.
+    k1_bar: np.array
+        Reduced hydrodynamic wavenumber :math:`\\omega b/U_0`.
+    K1_bar: np.array
+        Reduced convective wavenumber :math:`\\omega b/U_c`.
+    B: np.array
+        The :math:`B` parameter of :math:`L_1`.
+    eps: np.array
+        Imaginary correction :math:`\\epsilon` of :math:`L_2`.
+    E_etoile_2B: np.array
+        :math:`E^\\star(2B)`.
+    E_etoile_4mu: np.array
+        :math:`E^\\star(4\\mu)`.
+    H: np.array
+        Prefactor :math:`H` of :math:`L_2`.
+    fresnel_tol: float or None
+        Tolerance of the tabulated :math:`E^\\star` (see :class:`FresnelTable`)
+        used for the observer-dependent terms, or None for the exact one.
+    """
+
+    omega: np.array
+    nonzero: np.array
+    U0: float
+    c0: float
+    M0: float
+    b: float
+    alpha: float
+    mu: np.array
+    k1_bar: np.array
+    K1_bar: np.array
+    B: np.array
+    eps: np.array
+    E_etoile_2B: np.array
+    E_etoile_4mu: np.array
+    H: np.array
+    fresnel_tol: float | None = None
+
+    def matches(self, omega_array, U0, c0, M0, b, alpha, fresnel_tol=None) -> bool:
+        """Return True if the kernel was built for these frequencies and flow."""
+        omega_array = np.asarray(omega_array, dtype=float)
+        return (
+            (self.U0, self.c0, self.M0, self.b, self.alpha, self.fresnel_tol)
+            == (U0, c0, M0, b, alpha, fresnel_tol)
+            and self.omega.shape == omega_array.shape
+            and np.array_equal(self.omega, omega_array)
+        )
+
+
 ## On calcule la valeur de G
 
 
-def _compute_G(D, mu, epsilon):
-    E_etoile_4mu = _E_etoile(4.0 * mu)
+def _compute_G(D, mu, epsilon, E_etoile_4mu, fresnel_tol=None):
     E_4mu = np.conj(E_etoile_4mu)
-    E_etoile_2D = _E_etoile(2.0 * D)
+    E_etoile_2D = _E_etoile(2.0 * D, tol=fresnel_tol)
 
     Dm2mu = D - 2.0 * mu
     Dp2mu = D + 2.0 * mu
@@ -48,11 +323,41 @@ def _compute_G(D, mu, epsilon):
     return G
 
 
-##  Expressions analytiques L1, L2 (trailing edge)
-def _compute_L1_L2(omega, U0, c0, x1, S0, M0, b, alpha=1.0, a_param=None):
-    # On calcule L1 et L2 pour une fréquence angulaire omega
-    if a_param is None:
-        a_param = alpha
+@profiling.instrument()
+def compute_frequency_kernel(
+    omega_array, U0, c0, M0, b, alpha=1.0, fresnel_tol=None
+):
+    """
+    Precompute the observer-independent terms of the radiation integral.
+
+    Parameters
+    ----------
+    omega_array : array_like
+        Angular frequency array in rad/s, shape (n_freq,).
+    U0 : float
+        Free-stream velocity in m/s.
+    c0 : float
+        Speed of sound in m/s.
+    M0 : float
+        Free-stream Mach number, dimensionless.
+    b : float
+        Airfoil semi-chord (half chord length) in m.
+    alpha : float, optional
+        Convection velocity ratio Uc/U0. Default is 1.0.
+    fresnel_tol : float, optional
+        If given, :math:`E^\\star` is evaluated with a :class:`FresnelTable`
+        accurate to this tolerance instead of :func:`scipy.special.fresnel`.
+        Default is None (exact).
+
+    Returns
+    -------
+    kernel : FrequencyKernel
+        The frequency kernel, to be passed to
+        :func:`evaluate_radiation_integral`.
+    """
+    omegas = np.asarray(omega_array, dtype=float)
+    nonzero = omegas != 0
+    omega = omegas[nonzero]
 
     Uc = U0 * alpha
 
@@ -65,16 +370,55 @@ def _compute_L1_L2(omega, U0, c0, x1, S0, M0, b, alpha=1.0, a_param=None):
     k1_bar = k1 * b
     K1_bar = K1 * b
 
-    # Définitions B et C
+    # Définition B (C dépend de l'observateur)
     B = K1_bar + mu * (1.0 + M0)
-    C = K1_bar - mu * (x1 / S0 - M0)
 
-    if np.abs(C) < 1e-12:
-        C = np.sign(C) * 1e-12 + 1e-12
+    Theta = np.sqrt((K1_bar + mu * (M0 + 1.0)) / (k1_bar + mu * (M0 + 1.0)))
+    # Correction imaginaire ϵ (epsilon), égale à 1 là où mu = 0
+    mu_safe = np.where(mu != 0, mu, 1.0)
+    eps = np.where(mu != 0, (1.0 + 1.0 / (4.0 * mu_safe)) ** (-0.5), 1.0)
+    # -> si Θ≈1 alors le numerateur peut être 0
+    H = (1.0 + 1j) * np.exp(-1j * 4.0 * mu) * (1.0 - Theta**2)
+    H = H / (np.sqrt(np.pi * B) * (alpha - 1.0) * k1_bar + 1e-30)
+
+    return FrequencyKernel(
+        omega=omegas,
+        nonzero=nonzero,
+        U0=U0,
+        c0=c0,
+        M0=M0,
+        b=b,
+        alpha=alpha,
+        mu=mu,
+        k1_bar=k1_bar,
+        K1_bar=K1_bar,
+        B=B,
+        eps=eps,
+        E_etoile_2B=_E_etoile(2.0 * B, tol=fresnel_tol),
+        E_etoile_4mu=_E_etoile(4.0 * mu, tol=fresnel_tol),
+        H=H,
+        fresnel_tol=fresnel_tol,
+    )
+
+
+##  Expressions analytiques L1, L2 (trailing edge)
+def _compute_L1_L2(kernel, x1, S0):
+    # On calcule L1 et L2 pour toutes les fréquences non nulles du noyau, les
+    # observateurs étant rangés sur les axes suivants
+    shape = (-1,) + (1,) * np.broadcast(x1, S0).ndim
+    mu = kernel.mu.reshape(shape)
+    k1_bar = kernel.k1_bar.reshape(shape)
+    K1_bar = kernel.K1_bar.reshape(shape)
+    B = kernel.B.reshape(shape)
+    M0 = kernel.M0
+
+    # Définition C
+    C = K1_bar - mu * (x1 / S0 - M0)
+    C = np.where(np.abs(C) < 1e-12, np.sign(C) * 1e-12 + 1e-12, C)
 
     # E* evaluations
-    E_etoile_2B = _E_etoile(2.0 * B)
-    E_etoile_2Bminus2C = _E_etoile(2.0 * (B - C))
+    E_etoile_2B = kernel.E_etoile_2B.reshape(shape)
+    E_etoile_2Bminus2C = _E_etoile(2.0 * (B - C), tol=kernel.fresnel_tol)
 
     prefacteur = -np.exp(2j * C) / (1j * C)
     term1 = (1.0 + 1j) * np.exp(-2j * C) * np.sqrt(B / (B - C)) * E_etoile_2Bminus2C
@@ -84,29 +428,282 @@ def _compute_L1_L2(omega, U0, c0, x1, S0, M0, b, alpha=1.0, a_param=None):
 
     ## On calcule L2
     D = mu * (1.0 - x1 / S0)
-    Theta = np.sqrt((K1_bar + mu * (M0 + 1.0)) / (k1_bar + mu * (M0 + 1.0)))
-    # Correction imaginaire ϵ (epsilon)
-    eps = (1.0 + 1.0 / (4.0 * mu)) ** (-0.5) if mu != 0 else 1.0
-    # -> si Θ≈1 alors le numerateur peut être 0
-    H = (1.0 + 1j) * np.exp(-1j * 4.0 * mu) * (1.0 - Theta**2)
-    H = H / (np.sqrt(np.pi * B) * (alpha - 1.0) * k1_bar + 1e-30)
-    # Evaluer E*(4µ)
-    E_etoile_4mu = _E_etoile(4.0 * mu)
+    E_etoile_4mu = kernel.E_etoile_4mu.reshape(shape)
     # G = 1.0 # !!!
-    G = _compute_G(D, mu, eps)
+    G = _compute_G(
+        D, mu, kernel.eps.reshape(shape), E_etoile_4mu, kernel.fresnel_tol
+    )
     # Construction L2
     term_L2_a = np.exp(1j * 4.0 * mu) * (1.0 - (1.0 + 1j) * E_etoile_4mu)
     term_L2_b = -np.exp(2j * D)
     term_L2_c = 1j * (D + k1_bar + (M0 - 1.0) * mu) * G
 
-    L2 = H * (term_L2_a + term_L2_b + term_L2_c)
+    L2 = kernel.H.reshape(shape) * (term_L2_a + term_L2_b + term_L2_c)
 
     return L1, L2
 
 
+class RadiationWorkspace:
+    """Working arrays of the fused evaluation of the radiation integral.
+
+    :func:`evaluate_radiation_integral` evaluates :math:`I = L_1 + L_2` by
+    blocks of at most ``block_size`` (frequency, observer) pairs, with
+    in-place operations on these arrays only, so that the memory it needs
+    besides its result does not grow with the number of frequencies or of
+    observers. The arrays are allocated once and reused by every call given
+    the same workspace.
+
+    Parameters
+    ----------
+    block_size: int, optional
+        The number of (frequency, observer) pairs per block. Default is 8192,
+        i.e. 1 MiB of working arrays, which stay in the cache.
+
+    Attributes
+    ----------
+    nbytes: int
+        The size of the working arrays in bytes.
+
+
+    .. note::
+
+        A workspace must not be shared between threads. When no workspace is
+        given, :func:`evaluate_radiation_integral` uses one per thread.
+    """
+
+    N_REAL = 6
+    N_COMPLEX = 5
+
+    def __init__(self, block_size: int = 1 << 13):
+        if block_size < 1:
+            raise ValueError("The block size must be positive.")
+        self.block_size = block_size
+        self._real = np.empty((self.N_REAL, block_size))
+        self._complex = np.empty((self.N_COMPLEX, block_size), dtype=np.complex128)
+        self._mask = np.empty(block_size, dtype=bool)
+
+    @property
+    def nbytes(self) -> int:
+        return self._real.nbytes + self._complex.nbytes + self._mask.nbytes
+
+    def _arrays(self, shape):
+        # Vues des tableaux de travail, de la forme du bloc
+        size = int(np.prod(shape))
+        real = [a[:size].reshape(shape) for a in self._real]
+        complex_ = [a[:size].reshape(shape) for a in self._complex]
+        return real, complex_, self._mask[:size].reshape(shape)
+
+
+_workspaces = threading.local()
+
+
+def _default_workspace():
+    if not hasattr(_workspaces, "workspace"):
+        _workspaces.workspace = RadiationWorkspace()
+    return _workspaces.workspace
+
+
+def _E_etoile_into(x, out, t, S, tol=None):
+    # E*(x) écrit dans out, sans autre tableau temporaire que t et S
+    if tol is not None:
+        out[...] = _fresnel_table(tol)(x)
+        return
+    np.maximum(x, 1e-12, out=t)
+    t *= 2.0 / np.pi
+    np.sqrt(t, out=t)
+    fresnel(t, out=(S, out.real))
+    np.negative(S, out=out.imag)
+
+
+def _regularize(x, mask, scratch, value=None):
+    # Remplace en place les |x| < 1e-12, comme np.where dans _compute_L1_L2
+    np.abs(x, out=scratch)
+    np.less(scratch, 1e-12, out=mask)
+    if mask.any():
+        x[mask] = 1e-12 if value is None else value(x[mask])
+
+
+def _fused_coefficients(kernel):
+    # Termes de G et L2 qui ne dépendent que de la fréquence, shape (n, 1)
+    mu, eps = kernel.mu, kernel.eps
+    E_4mu = kernel.E_etoile_4mu
+    e2mu = np.exp(2j * mu)
+    e4mu = np.exp(4j * mu)
+    coefs = {
+        "mu": mu,
+        "two_mu": 2.0 * mu,
+        "K1_bar": kernel.K1_bar,
+        "B": kernel.B,
+        "H": kernel.H,
+        # L1 = i/C ((1+i) sqrt(B/(B-C)) E*(2B-2C) + exp(2iC) q)
+        "q": 1.0 - (1.0 + 1j) * kernel.E_etoile_2B,
+        # G = exp(iD) (c1 sin(D-2mu)/(D-2mu) + c2 sin(D+2mu)/(D+2mu))
+        #     + c3/(D-2mu) + c4/(D+2mu)
+        #     + exp(2iD) sqrt(D/2mu) E*(2D) (c5p/(D+2mu) + c5m/(D-2mu)) / 2
+        "c1": (1.0 + eps) * e2mu,
+        "c2": (1.0 - eps) * np.conj(e2mu),
+        "c3": (1.0 + eps) * (1.0 - 1j) / 2.0 * e4mu * E_4mu,
+        "c4": -(1.0 - eps) * (1.0 + 1j) / 2.0 * np.conj(e4mu * E_4mu),
+        "c5p": (1.0 - eps) * (1.0 + 1j),
+        "c5m": -(1.0 + eps) * (1.0 - 1j),
+        # L2 = H (A - exp(2iD) + i (D + k1_bar + (M0 - 1) mu) G)
+        "A": e4mu * (1.0 - (1.0 + 1j) * E_4mu),
+        "k": kernel.k1_bar + (kernel.M0 - 1.0) * mu,
+    }
+    return {name: value[:, None] for name, value in coefs.items()}
+
+
+def _fused_block(coefs, r, M0, workspace, fresnel_tol):
+    # I = L1 + L2 d'un bloc de fréquences (lignes) et d'observateurs
+    # (colonnes), r = x1/S0. Toutes les opérations sont faites en place dans
+    # les tableaux du workspace; le résultat est le premier tableau complexe.
+    c = coefs
+    shape = (c["mu"].shape[0], r.shape[0])
+    (R0, R1, R2, R3, R4, R5), (I, Z1, Z2, Z3, Z4), mask = workspace._arrays(shape)
+
+    # L1, avec C = K1_bar - mu (x1/S0 - M0)
+    np.multiply(c["mu"], r - M0, out=R0)
+    np.subtract(c["K1_bar"], R0, out=R0)
+    _regularize(R0, mask, R1, value=lambda C: np.sign(C) * 1e-12 + 1e-12)
+    np.subtract(c["B"], R0, out=R1)  # B - C
+    np.multiply(R1, 2.0, out=R2)
+    _E_etoile_into(R2, I, R3, R4, fresnel_tol)
+    np.divide(c["B"], R1, out=R2)
+    np.sqrt(R2, out=R2)
+    I *= R2
+    I *= 1.0 + 1j
+    np.multiply(R0, 2.0, out=R2)
+    np.cos(R2, out=Z1.real)
+    np.sin(R2, out=Z1.imag)
+    Z1 *= c["q"]
+    I += Z1
+    I /= R0
+    I *= 1j
+
+    # G, avec D = mu (1 - x1/S0)
+    np.multiply(c["mu"], 1.0 - r, out=R0)
+    np.subtract(R0, c["two_mu"], out=R1)  # D - 2 mu
+    np.add(R0, c["two_mu"], out=R2)  # D + 2 mu
+    np.sin(R1, out=R3)
+    np.sin(R2, out=R4)
+    _regularize(R1, mask, R5)
+    _regularize(R2, mask, R5)
+    np.reciprocal(R1, out=R1)
+    np.reciprocal(R2, out=R2)
+    R3 *= R1
+    R4 *= R2
+    np.multiply(c["c1"], R3, out=Z1)
+    np.multiply(c["c2"], R4, out=Z3)
+    Z1 += Z3
+    np.cos(R0, out=Z2.real)  # exp(iD)
+    np.sin(R0, out=Z2.imag)
+    Z1 *= Z2
+    np.multiply(c["c3"], R1, out=Z3)
+    Z1 += Z3
+    np.multiply(c["c4"], R2, out=Z3)
+    Z1 += Z3
+    np.multiply(c["c5p"], R2, out=Z3)
+    np.multiply(c["c5m"], R1, out=Z4)
+    Z3 += Z4
+    np.multiply(R0, 2.0, out=R3)
+    _E_etoile_into(R3, Z4, R4, R5, fresnel_tol)
+    Z3 *= Z4
+    np.divide(R0, c["two_mu"], out=R3)
+    np.sqrt(R3, out=R3)
+    Z3 *= R3
+    np.multiply(Z2, Z2, out=Z4)  # exp(2iD)
+    Z3 *= Z4
+    Z3 *= 0.5
+    Z1 += Z3
+
+    # L2
+    np.add(R0, c["k"], out=R3)
+    Z1 *= R3
+    Z1 *= 1j
+    Z1 -= Z4
+    Z1 += c["A"]
+    Z1 *= c["H"]
+    I += Z1
+    return I
+
+
+@profiling.instrument()
+def evaluate_radiation_integral(kernel, x1, S0, workspace=None, fused=True):
+    """
+    Evaluate the radiation integral from a precomputed frequency kernel.
+
+    Only the observer-dependent terms (:math:`C`, :math:`D` and :math:`G`)
+    are computed here, see :func:`compute_radiation_integral` for the
+    complete description.
+
+    Parameters
+    ----------
+    kernel : FrequencyKernel
+        Observer-independent terms, from :func:`compute_frequency_kernel`.
+    x1 : float or array_like
+        Observer x-coordinate (streamwise direction) in m.
+    S0 : float or array_like
+        Observer distance from trailing edge in m, broadcastable with ``x1``.
+    workspace : RadiationWorkspace, optional
+        The working arrays of the fused evaluation. Default is a workspace
+        kept for each thread.
+    fused : bool, optional
+        If False, :math:`L_1`, :math:`L_2` and :math:`G` are evaluated term by
+        term on whole arrays, as written in the references, which needs about
+        30 temporaries of the size of the result. Default is True.
+
+    Returns
+    -------
+    I : ndarray, complex
+        Complex radiation integral values, shape (n_freq,) for a single
+        observer or (n_freq, n_obs) when ``x1``/``S0`` are arrays.
+
+
+    .. note::
+
+        The fused evaluation rearranges the terms so that only 3 complex
+        exponentials and 2 :math:`E^\\star` evaluations are needed per
+        (frequency, observer) pair, the factors which only depend on the
+        frequency being computed once. It agrees with the term by term
+        evaluation to the rounding errors.
+    """
+    x1 = np.asarray(x1, dtype=float)
+    S0 = np.asarray(S0, dtype=float)
+    obs_shape = np.broadcast_shapes(x1.shape, S0.shape)
+
+    I = np.zeros(kernel.omega.shape + obs_shape, dtype=np.complex128)
+    # TODO: implement correct asymptotic behavior for omega = 0
+    if not fused:
+        L1, L2 = _compute_L1_L2(kernel, x1, S0)
+        I[kernel.nonzero] = L1 + L2
+        return I
+
+    workspace = workspace or _default_workspace()
+    r = np.broadcast_to(x1 / S0, obs_shape).ravel()
+    if r.size == 0:
+        return I
+    rows = np.flatnonzero(kernel.nonzero)
+    I_rows = I.reshape(kernel.omega.shape[0], r.size)
+    coefs = _fused_coefficients(kernel)
+    step = max(workspace.block_size // r.size, 1)
+    for start in range(0, rows.size, step):
+        block = slice(start, start + step)
+        for c_start in range(0, r.size, workspace.block_size):
+            columns = slice(c_start, c_start + workspace.block_size)
+            I_block = _fused_block(
+                {name: value[block] for name, value in coefs.items()},
+                r[columns],
+                kernel.M0,
+                workspace,
+                kernel.fresnel_tol,
+            )
+            I_rows[rows[block], columns] = I_block
+    return I
+
+
 ##  Fonction principale
 def compute_radiation_integral(
-    omega_array, U0, c0, x1, S0, M0, b, alpha=1.0, a_param=None
+    omega_array, U0, c0, x1, S0, M0, b, alpha=1.0, a_param=None, fresnel_tol=None
 ):
     """
     Compute the Amiet radiation integral for airfoil trailing edge noise.
@@ -116,6 +713,10 @@ def compute_radiation_integral(
     fluctuations to far-field sound pressure in the Amiet model. The 
     integral accounts for the acoustic scattering effects at the airfoil
     trailing edge.
+
+    The observer-independent terms are computed by
+    :func:`compute_frequency_kernel`; when many observers share the same flow,
+    build the kernel once and call :func:`evaluate_radiation_integral` instead.
     
     Parameters
     ----------
@@ -125,10 +726,11 @@ def compute_radiation_integral(
         Free-stream velocity in m/s.
     c0 : float
         Speed of sound in m/s.
-    x1 : float
-        Observer x-coordinate (streamwise direction) in m.
-    S0 : float
-        Observer distance from trailing edge in m.
+    x1 : float or array_like
+        Observer x-coordinate (streamwise direction) in m. An array of
+        shape (n_obs,) evaluates all observers at once.
+    S0 : float or array_like
+        Observer distance from trailing edge in m, broadcastable with ``x1``.
     M0 : float
         Free-stream Mach number, dimensionless.
     b : float
@@ -139,11 +741,16 @@ def compute_radiation_integral(
     a_param : float, optional
         Alternative parameter for convection velocity ratio. If provided,
         overrides the alpha parameter. Default is None.
+    fresnel_tol : float, optional
+        If given, the Fresnel integrals are interpolated from a
+        :class:`FresnelTable` accurate to this tolerance, which is faster
+        for dense observer maps. Default is None (exact evaluation).
         
     Returns
     -------
     I : ndarray, complex
-        Complex radiation integral values, shape (n_freq,).
+        Complex radiation integral values, shape (n_freq,) for a single
+        observer or (n_freq, n_obs) when ``x1``/``S0`` are arrays.
         The magnitude squared :math:`\\vert I\\vert^2` represents the acoustic efficiency
         of the trailing edge scattering process.
         
@@ -197,15 +804,10 @@ def compute_radiation_integral(
     
     """
     
-    omegas = np.asarray(omega_array, dtype=float)
-    I_list = []
-    for omega in omegas:
-        if omega == 0:
-            I_list.append(0.0)  # TODO: implement correct asymptotic behavior
-            continue
-        L1, L2 = _compute_L1_L2(
-            omega, U0, c0, x1, S0, M0, b, alpha=alpha, a_param=a_param
-        )
-        I = L1 + L2
-        I_list.append(I)
-    return np.array(I_list)
+    if a_param is None:
+        a_param = alpha
+
+    kernel = compute_frequency_kernel(
+        omega_array, U0, c0, M0, b, alpha=alpha, fresnel_tol=fresnel_tol
+    )
+    return evaluate_radiation_integral(kernel, x1, S0)
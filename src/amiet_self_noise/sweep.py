@@ -0,0 +1,210 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from amiet_self_noise.amiet_model import far_field_transfer
+
+SWEEP_PARAMETERS = ("U0", "T", "b", "L", "rho", "alpha")
+"""The configuration parameters that can be swept."""
+
+
+@dataclass
+class SweepResult:
+    """Far-field PSD over a grid of flow conditions, as a labeled array.
+
+    Parameters
+    ----------
+    dims: tuple
+        The names of the axes of :attr:`psd`: the swept parameters, in the
+        order of the grid, followed by ``'freq'`` and ``'obs'``.
+    coords: dict
+        The values of each swept parameter, and the observer positions under
+        the ``'obs'`` key, shape (n_obs, 3).
+    f: np.ndarray
+        The frequencies in Hz at each grid point, shape (*grid_shape, n_freq).
+        They only differ between grid points when the statistics are rescaled.
+    psd: np.ndarray
+        The power spectral density in Pa²/Hz, shape (*grid_shape, n_freq, n_obs).
+    """
+
+    dims: tuple
+    coords: dict
+    f: np.ndarray
+    psd: np.ndarray
+
+    @property
+    def grid_shape(self) -> tuple:
+        return self.psd.shape[:-2]
+
+    def sel(self, **values):
+        """Select the grid point(s) matching the given parameter values.
+
+        Parameters
+        ----------
+        **values : dict
+            Parameter values, e.g. ``U0=40.0``. Parameters that are not given
+            are kept whole.
+
+        Returns
+        -------
+        f : np.ndarray
+            The frequencies of the selection.
+        psd : np.ndarray
+            The PSD of the selection.
+        """
+        index = []
+        for dim in self.dims[:-2]:
+            if dim in values:
+                matches = np.flatnonzero(np.isclose(self.coords[dim], values.pop(dim)))
+                if matches.size == 0:
+                    raise KeyError(f"No grid point with the requested {dim}.")
+                index.append(matches[0])
+            else:
+                index.append(slice(None))
+        if values:
+            raise KeyError(f"Unknown sweep parameters: {', '.join(values)}")
+        index = tuple(index)
+        return self.f[index], self.psd[index]
+
+
+def parametric_sweep(
+    model,
+    obs=None,
+    rescale: bool | None = None,
+    n_workers: int | None = None,
+    chunk_size: int | None = 128,
+    **grid,
+) -> SweepResult:
+    """
+    Evaluate the Amiet model over a grid of flow conditions.
+
+    The wall-pressure statistics (:math:`\\Phi_{pp}` and :math:`\\ell_y`) are
+    computed once from the data of ``model``; only the radiation integral and
+    the directivity are evaluated at each grid point, for all the frequencies
+    and observers at once. The grid points are not vectorized against each
+    other, except that those which only differ by ``L`` or ``rho`` share a
+    single evaluation of the acoustic transfer (see
+    :func:`far_field_transfer <amiet_self_noise.amiet_model.far_field_transfer>`),
+    their PSD being computed together from it.
+
+    Parameters
+    ----------
+    model : AmietModel
+        The model providing the data and the base configuration.
+    obs : array_like, optional
+        Observer positions in meters, shape (n_obs, 3). Default is the
+        observers of the configuration.
+    rescale : bool, optional
+        If True, the statistics are re-dimensionalized with the flow of each
+        grid point, exactly as :class:`InputData <amiet_self_noise.io_utils.InputData>`
+        de-normalizes the DNS data: the frequencies scale with
+        :math:`U_0/2b`, :math:`\\Phi_{pp}` with :math:`p_{dyn}^2\\,2b/U_0` and
+        :math:`\\ell_y` with :math:`2b`. Default is True if the data of
+        ``model`` has been de-normalized, False otherwise.
+    n_workers : int, optional
+        Number of processes over which the grid points are distributed. If
+        None, the grid is evaluated in the current process.
+    chunk_size : int, optional
+        Maximum number of observers evaluated in a single broadcasted pass,
+        see :meth:`AmietModel.evaluate_psd`. Default is 128.
+    **grid : dict
+        The values of the swept parameters, e.g. ``U0=[20, 30, 40]`` or
+        ``alpha=np.linspace(0.6, 0.8, 5)``. See :data:`SWEEP_PARAMETERS`.
+
+    Returns
+    -------
+    SweepResult
+        The PSD over the grid.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+        model = asn.amiet_model.AmietModel(input_data)
+        result = asn.sweep.parametric_sweep(
+            model, U0=[20.0, 30.0, 40.0], alpha=[0.6, 0.7, 0.8]
+        )
+        f, psd = result.sel(U0=30.0, alpha=0.7)
+    """
+    unknown = set(grid) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Cannot sweep over: {', '.join(sorted(unknown))}")
+
+    base = model.input_data.config
+    obs = base.obs if obs is None else np.atleast_2d(np.asarray(obs, dtype=float))
+    if rescale is None:
+        rescale = getattr(model.input_data, "normalize", False)
+
+    f, phi_pp, ly = model.statistics()
+
+    dims = tuple(grid)
+    coords = {dim: np.atleast_1d(np.asarray(grid[dim], dtype=float)) for dim in dims}
+    grid_shape = tuple(coords[dim].size for dim in dims)
+    points = [
+        dict(zip(dims, values))
+        for values in itertools.product(*(coords[dim] for dim in dims))
+    ]
+    args = (f, phi_pp, ly, obs, base, rescale, chunk_size)
+
+    if n_workers is None:
+        results = _sweep_points(points, *args)
+    else:
+        n_workers = n_workers or os.cpu_count() or 1
+        # Contiguous batches keep the grid order and the points sharing a
+        # transfer together
+        size = -(-len(points) // n_workers)
+        batches = [points[i : i + size] for i in range(0, len(points), size)]
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = [pool.submit(_sweep_points, batch, *args) for batch in batches]
+            results = [result for future in futures for result in future.result()]
+
+    coords["obs"] = obs
+    return SweepResult(
+        dims=dims + ("freq", "obs"),
+        coords=coords,
+        f=np.array([f_point for f_point, _ in results]).reshape(grid_shape + (-1,)),
+        psd=np.array([psd for _, psd in results]).reshape(
+            grid_shape + (f.shape[0], obs.shape[0])
+        ),
+    )
+
+
+def _sweep_points(points, f, phi_pp, ly, obs, base, rescale, chunk_size):
+    # Evaluate a batch of grid points, vectorized over frequencies and
+    # observers. The transfer does not depend on L and rho: the points that
+    # only differ by them are grouped and their PSD computed at once.
+    groups = {}
+    for i, point in enumerate(points):
+        config = replace(base, **point)
+        key = (config.U0, config.T, config.b, config.alpha)
+        groups.setdefault(key, []).append((i, config))
+
+    results = [None] * len(points)
+    for members in groups.values():
+        sources = []
+        for _, config in members:
+            if rescale:
+                f_point, phi_pp_point, ly_point = _rescale_statistics(
+                    f, phi_pp, ly, base, config
+                )
+            else:
+                f_point, phi_pp_point, ly_point = f, phi_pp, ly
+            sources.append(2 * config.L * phi_pp_point * ly_point)
+        transfer = far_field_transfer(f_point, obs, config, chunk_size=chunk_size)
+        psd = np.asarray(sources)[:, :, None] * transfer
+        for (i, _), psd_point in zip(members, psd):
+            results[i] = (f_point, psd_point)
+    return results
+
+
+def _rescale_statistics(f, phi_pp, ly, base, config):
+    # Statistics de-normalized with `base`, re-dimensionalized with `config`
+    time_ratio = config.time_scale / base.time_scale
+    f = f / time_ratio
+    phi_pp = phi_pp * (config.p_dyn / base.p_dyn) ** 2 * time_ratio
+    ly = ly * config.b / base.b
+    return f, phi_pp, ly
@@ -0,0 +1,280 @@
+import argparse
+import asyncio
+import os
+import time
+from dataclasses import replace
+
+import numpy as np
+from rich.console import Console
+
+from amiet_self_noise.amiet_model import AmietModel
+from amiet_self_noise.io_utils import (
+    InputData,
+    PressureSlabs,
+    data_files,
+    read_config,
+    write_results,
+)
+from amiet_self_noise.online import OnlineEstimator
+
+RESULTS_NAME = "results.h5"
+"""The name of the results file, in the output directory."""
+
+PLOT_NAME = "psd.png"
+"""The name of the PSD plot, in the output directory."""
+
+
+async def watch(
+    config_path: str,
+    out_dir: str | None = None,
+    interval: float = 5.0,
+    max_pending: int = 2,
+    tolerance: float = 0.01,
+    idle_timeout: float | None = None,
+    plot: bool = False,
+    normalize: bool = True,
+    console: Console | None = None,
+) -> OnlineEstimator | None:
+    """
+    Follow the pressure slabs written by a running solver and update the PSD.
+
+    The ``data_path`` of the configuration is a glob pattern of the slabs
+    (see :class:`PressureSlabs <amiet_self_noise.io_utils.PressureSlabs>`);
+    it is polled every ``interval`` seconds, and every new slab is pushed into
+    an :class:`OnlineEstimator <amiet_self_noise.online.OnlineEstimator>`.
+    Three tasks run concurrently: the polling of the directory, the reading
+    of the slabs and the spectral accumulation, the last two in threads.
+    After each slab, the results are written to ``out_dir/results.h5`` (see
+    :func:`write_results <amiet_self_noise.io_utils.write_results>`), and the
+    PSD plotted to ``out_dir/psd.png`` if ``plot`` is set, but only if the PSD
+    changed by more than ``tolerance``.
+
+    Parameters
+    ----------
+    config_path : str
+        The configuration file of the case. ``nperseg`` is required.
+    out_dir : str, optional
+        The directory of the results. Default is ``config.out_dir``.
+    interval : float, optional
+        The time between two polls of the directory, in seconds. Default is 5.
+    max_pending : int, optional
+        The maximum number of slabs waiting to be read, and of blocks of
+        pressure waiting to be accumulated. Default is 2.
+    tolerance : float, optional
+        The change of the PSD, in dB, below which the results are not
+        rewritten. Default is 0.01.
+    idle_timeout : float, optional
+        Stop once no new slab has appeared for this time, in seconds, and all
+        the slabs are processed. Default is None (run until cancelled).
+    plot : bool, optional
+        If True, plot the PSD of every observer with the results. Default is
+        False.
+    normalize : bool, optional
+        If True, the data is de-normalized, see :class:`InputData
+        <amiet_self_noise.io_utils.InputData>`. Default is True.
+    console : rich.console.Console, optional
+        Console on which the progress is printed. If None, creates a new one.
+
+    Returns
+    -------
+    estimator : OnlineEstimator or None
+        The estimator fed with all the slabs, or None if no slab was read.
+
+
+    .. note::
+
+        A slab is read once its size and modification time are the same at
+        two successive polls, so that a file still being written is not read.
+        A slab that cannot be read yet (e.g. its ``pressure`` or ``T_s``
+        dataset is not written) is tried again at the next polls.
+        The queues between the tasks are bounded: when the slabs arrive faster
+        than they are processed, the polling waits, and at most about
+        ``2 * max_pending + 2`` blocks of ``8 * nperseg`` time steps are in
+        memory. A slab that does not follow the previous one in time (a gap,
+        an overlap or a different grid) is skipped with an error message.
+    """
+    console = console or Console()
+    config = read_config(config_path)
+    if config.nperseg is None:
+        raise ValueError("nperseg is required to follow a running simulation.")
+    out_dir = out_dir or config.out_dir
+    os.makedirs(out_dir, exist_ok=True)
+    block_size = 8 * config.nperseg  # 16 hops of the Welch segments
+
+    slabs = asyncio.Queue(maxsize=max_pending)  # None when the watch ends
+    blocks = asyncio.Queue(maxsize=max_pending)  # a path at the end of a slab
+    online = None
+
+    in_flight = set()  # the slabs queued or being read
+    done = set()  # the slabs read, or skipped for good
+
+    async def poll():
+        seen = {}  # the size and modification time at the last poll
+        tried = set()
+        last_slab = time.monotonic()
+        while True:
+            try:
+                paths = await asyncio.to_thread(data_files, config.data_path)
+            except FileNotFoundError:
+                paths = []
+            for path in paths:
+                if path in in_flight or path in done:
+                    continue
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                signature = (stat.st_size, stat.st_mtime_ns)
+                if seen.get(path) == signature:
+                    in_flight.add(path)
+                    await slabs.put(path)  # waits while the reading lags behind
+                    if path not in tried:
+                        tried.add(path)
+                        last_slab = time.monotonic()
+                else:
+                    seen[path] = signature
+            idle = time.monotonic() - last_slab
+            if idle_timeout is not None and idle > idle_timeout:
+                await slabs.put(None)
+                return
+            await asyncio.sleep(interval)
+
+    async def ingest():
+        nonlocal online
+        previous = None
+        while (path := await slabs.get()) is not None:
+            try:
+                if previous is not None:
+                    pair = await asyncio.to_thread(PressureSlabs, [previous, path])
+                    if pair.paths[-1] != path:
+                        raise ValueError(f"it precedes {previous} in time")
+                slab_config = replace(
+                    config, data_path=path, lazy=True, streaming=False, cache=False
+                )
+                input_data = await asyncio.to_thread(InputData, slab_config, normalize)
+            except (OSError, KeyError) as error:
+                # Not complete yet: read again at a later poll
+                in_flight.discard(path)
+                console.print(f"[yellow]Cannot read {path} yet: {error}[/yellow]")
+                continue
+            except ValueError as error:
+                in_flight.discard(path)
+                done.add(path)
+                console.print(f"[bold red]Skipping {path}: {error}[/bold red]")
+                continue
+            in_flight.discard(path)
+            done.add(path)
+            if online is None:
+                online = OnlineEstimator(AmietModel(input_data))
+            previous = path
+            iterator = input_data.iter_pressure(block_size)
+            while (block := await asyncio.to_thread(next, iterator, None)) is not None:
+                await blocks.put(block)
+            await blocks.put(path)
+        await blocks.put(None)
+
+    async def accumulate():
+        written = None
+        while (item := await blocks.get()) is not None:
+            if isinstance(item, str):
+                published = await asyncio.to_thread(
+                    _publish, online, item, written, config, out_dir, tolerance, plot
+                )
+                if published is not None:
+                    written = published
+                console.print(
+                    f"[green]{os.path.basename(item)}: "
+                    f"{online.n_segments} segments[/green]"
+                )
+            else:
+                await asyncio.to_thread(online.update, item)
+
+    async with asyncio.TaskGroup() as group:
+        group.create_task(poll())
+        group.create_task(ingest())
+        group.create_task(accumulate())
+    return online
+
+
+def _publish(online, path, written, config, out_dir, tolerance, plot):
+    # Write the results if the PSD changed since they were last written;
+    # return the PSD written, or None
+    if online.n_segments == 0:
+        return None
+    f, psd = online.psd()
+    if written is not None:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = np.abs(10 * np.log10(psd / written))
+        if np.nanmax(change, initial=0.0) <= tolerance:
+            return None
+    _, phi_pp, ly = online.model.statistics()
+    write_results(
+        os.path.join(out_dir, RESULTS_NAME),
+        f,
+        psd,
+        config,
+        phi_pp=phi_pp,
+        ly=ly,
+        obs=online.obs,
+    )
+    if plot:
+        _plot_psd(os.path.join(out_dir, PLOT_NAME), f, psd, title=path)
+    return psd
+
+
+def _plot_psd(path, f, psd, title=None):
+    # Without pyplot, so that it can run in a worker thread
+    from matplotlib.figure import Figure
+
+    p_ref = 2e-5  # Reference pressure in Pa
+    fig = Figure()
+    ax = fig.subplots()
+    for i in range(psd.shape[1]):
+        ax.semilogx(f[1:], 10 * np.log10(psd[1:, i] / p_ref**2), label=f"Obs {i + 1}")
+    ax.set_xlabel(r"$f$ [Hz]")
+    ax.set_ylabel(r"$10\log(S_{pp}/p^2_{\mathrm{ref}})$ [dB]")
+    if title is not None:
+        ax.set_title(os.path.basename(title))
+    ax.grid()
+    ax.legend()
+    fig.savefig(path)
+
+
+def main(argv=None) -> int:
+    """Command line entry point of :func:`watch`, see ``run_watch.py``."""
+    parser = argparse.ArgumentParser(
+        prog="run_watch.py",
+        description="Update the PSD of a running simulation as its slabs arrive.",
+    )
+    parser.add_argument("config", help="configuration file of the case")
+    parser.add_argument("-o", "--out-dir", help="output directory")
+    parser.add_argument(
+        "--interval", type=float, default=5.0, help="time between polls, in s"
+    )
+    parser.add_argument(
+        "--max-pending", type=int, default=2, help="slabs and blocks held in queue"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.01, help="PSD change to rewrite, in dB"
+    )
+    parser.add_argument(
+        "--idle-timeout", type=float, help="stop after this time without slab, in s"
+    )
+    parser.add_argument("--plot", action="store_true", help="plot the PSD")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(
+            watch(
+                args.config,
+                out_dir=args.out_dir,
+                interval=args.interval,
+                max_pending=args.max_pending,
+                tolerance=args.tolerance,
+                idle_timeout=args.idle_timeout,
+                plot=args.plot,
+            )
+        )
+    except KeyboardInterrupt:
+        pass  # the results of the slabs processed so far are written
+    return 0
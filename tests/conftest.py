@@ -0,0 +1,64 @@
+import h5py
+import yaml
+
+import numpy as np
+import pytest
+
+
+def write_dns_case(
+    directory, nt=4096, nx=4, ny=12, seed=0, contiguous=False, **config
+):
+    """Write a synthetic DNS case (mesh, pressure and config files).
+
+    Returns the path to the YAML configuration file.
+    """
+    rng = np.random.default_rng(seed)
+    x, y = np.meshgrid(np.linspace(0, 0.5, nx), np.linspace(0, 0.2, ny), indexing="ij")
+    mesh_path = str(directory / "grid.h5")
+    with h5py.File(mesh_path, "w") as f:
+        f.create_dataset("x", data=x)
+        f.create_dataset("y", data=np.zeros_like(x))
+        f.create_dataset("z", data=y)
+
+    # Spanwise-correlated pressure: a common signal plus independent noise
+    common = rng.normal(0, 1, (nt, nx, 1))
+    pressure = common + 0.5 * rng.normal(0, 1, (nt, nx, ny))
+    data_path = str(directory / "pressure.h5")
+    with h5py.File(data_path, "w") as f:
+        chunks = None if contiguous else (256, 1, ny)
+        f.create_dataset("pressure", data=pressure, chunks=chunks)
+        f.create_dataset("T_s", data=0.01)
+
+    case = {
+        "b": 0.0678,
+        "T": 10.2,
+        "L": 1.0,
+        "U0": 16.0,
+        "rho": 1.225,
+        "obs": [[0.0, 0.0, 1.21], [0.0, 0.0, 2.42]],
+        "data_type": "dns",
+        "data_path": data_path,
+        "mesh_path": mesh_path,
+        "out_dir": str(directory),
+        "xprobes": 1,
+        "yprobes": None,
+    }
+    case.update(config)
+    config_path = str(directory / "config.yaml")
+    with open(config_path, "w") as f:
+        yaml.dump(case, f)
+    return config_path
+
+
+@pytest.fixture
+def dns_case(tmp_path):
+    """Factory fixture writing a synthetic DNS case in a temporary directory.
+
+    The case is written in ``directory`` if given, e.g. a sub-directory of
+    ``tmp_path`` for tests that need several cases.
+    """
+
+    def factory(directory=None, **kwargs):
+        return write_dns_case(tmp_path if directory is None else directory, **kwargs)
+
+    return factory
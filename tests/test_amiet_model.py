@@ -1,5 +1,10 @@
+import asyncio
+import os
 import os.path as osp
+from dataclasses import replace
+from types import SimpleNamespace
 
+import h5py
 import yaml
 
 import numpy as np
@@ -8,6 +13,7 @@ import matplotlib.pyplot as plt
 import amiet_self_noise as asn
 
 from rich import print
+from rich.console import Console
 
 OUTPUT_DIR = (
     "/home/daep/e.foglia/Documents/2A/01_cours/UdeS/02_aeroscoustics/project/out/"
@@ -156,6 +162,622 @@ def test_radiation_integral():
     print("[bold green]Radiation integral test passed![/bold green]")
 
 
+def test_radiation_integral_vectorized():
+    omega_vals = np.concatenate([[0.0], np.linspace(100, 2000, 100)])
+    U = 50  # m/s
+    c0 = np.sqrt(1.4 * 287 * 300.0)  # m/s
+    M = U / c0
+    x1, x3 = 1.0, 2.0
+    S0 = np.sqrt(x1**2 + (1 - M**2) * x3**2)
+    b = 1.0
+
+    I_values = asn.radiation_integral.compute_radiation_integral(
+        omega_vals, U, c0, x1, S0, M, b, alpha=0.7
+    )
+    # Values of the original per-frequency implementation
+    I_reference = {
+        1: -1.043733565034241 + 0.7046849822349857j,
+        30: -0.007343591319341106 + 0.0673329657341286j,
+        60: 0.02924672911768739 + 0.07034200152652288j,
+        100: 0.012927960925761975 + 0.04162079454777865j,
+    }
+
+    assert I_values.shape == omega_vals.shape, (
+        "Output shape should match input omega shape."
+    )
+    assert I_values[0] == 0.0, "Radiation integral should be zero at omega = 0."
+    assert np.all(np.isfinite(I_values)), "Radiation integral should be finite."
+    for k, I_ref in I_reference.items():
+        assert np.isclose(I_values[k], I_ref, rtol=1e-10, atol=0), (
+            f"Vectorized evaluation should match the reference at omega={omega_vals[k]}"
+        )
+    print("[bold green]Vectorized radiation integral test passed![/bold green]")
+
+
+def test_fresnel_table():
+    # Reference comparison against scipy.special.fresnel, in and beyond the table
+    for tol in [1e-6, 1e-10]:
+        table = asn.radiation_integral.FresnelTable(tol)
+        assert table.reference_error() <= tol, f"Table error above {tol}"
+        x = np.random.default_rng(0).uniform(-1.0, 50 * table.x_max, 10_000)
+        assert table.reference_error(x) <= tol, f"Asymptotic error above {tol}"
+
+    omega_vals = np.linspace(100, 20000, 200)
+    U, c0, b = 50, np.sqrt(1.4 * 287 * 300.0), 0.1
+    M = U / c0
+    x1 = np.linspace(-2.0, 2.0, 50)
+    S0 = np.sqrt(x1**2 + (1 - M**2) * 2.0**2)
+    I_exact = asn.radiation_integral.compute_radiation_integral(
+        omega_vals, U, c0, x1, S0, M, b, alpha=0.7
+    )
+    I_table = asn.radiation_integral.compute_radiation_integral(
+        omega_vals, U, c0, x1, S0, M, b, alpha=0.7, fresnel_tol=1e-12
+    )
+    assert np.allclose(I_table, I_exact, rtol=1e-8, atol=1e-12), (
+        "Tabulated and exact Fresnel integrals should give the same integral."
+    )
+    print("[bold green]Fresnel table test passed![/bold green]")
+
+
+def test_evaluate_psd_batched():
+    config = asn.io_utils.ConfigData(
+        b=0.0678,
+        T=10.2,
+        L=1.0,
+        rho=1.225,
+        obs=np.array([[0.0, 0.0, 1.21], [0.5, 0.2, 2.42], [-0.3, 0.1, 1.0]]),
+        U0=16.0,
+        data_type="dns",
+    )
+    model = asn.amiet_model.AmietModel(SimpleNamespace(config=config))
+
+    f = np.linspace(0, 5000, 257)
+    phi_pp = 1.0 / (1.0 + (f / 1000) ** 2)
+    ly = 0.01 / (1.0 + f / 2000)
+
+    psd = model.evaluate_psd(f, phi_pp, ly, config.obs, chunk_size=None)
+    psd_chunked = model.evaluate_psd(f, phi_pp, ly, config.obs, chunk_size=2)
+
+    beta2 = 1 - config.M0**2
+    for i, observer in enumerate(config.obs):
+        I = np.abs(model.compute_radiation_integral(f, observer)) ** 2
+        S02 = observer[0] ** 2 + beta2 * (observer[1] ** 2 + observer[2] ** 2)
+        directivity = (observer[2] * f * config.b / config.c0 / S02) ** 2
+        expected = directivity * 2 * config.L * phi_pp * ly * I
+        assert np.allclose(psd[:, i], expected, rtol=1e-12), (
+            "Batched PSD should match the per-observer evaluation."
+        )
+
+    assert psd.shape == (f.shape[0], config.n_obs), "PSD should be (n_freq, n_obs)."
+    assert np.array_equal(psd, psd_chunked), "Chunking should not change the PSD."
+    print("[bold green]Batched PSD test passed![/bold green]")
+
+
+def test_frequency_kernel_reuse():
+    omega_vals = np.linspace(0, 2000, 101)
+    U = 50  # m/s
+    c0 = np.sqrt(1.4 * 287 * 300.0)  # m/s
+    M = U / c0
+    b = 1.0
+    x1 = np.array([1.0, -0.5, 0.0])
+    S0 = np.array([2.0, 1.5, 1.0])
+
+    kernel = asn.radiation_integral.compute_frequency_kernel(
+        omega_vals, U, c0, M, b, alpha=0.7
+    )
+    I_kernel = asn.radiation_integral.evaluate_radiation_integral(kernel, x1, S0)
+    # Values of the original per-frequency implementation, at omega_vals[k]
+    I_reference = np.array(
+        [
+            [
+                -0.3190965255414401 + 0.7955659940248361j,
+                -0.6081524542898071 + 0.5593819218189809j,
+                -0.5146718990096973 + 0.68022783601965j,
+            ],
+            [
+                0.03291558127863311 + 0.10612619069067274j,
+                0.05046176009648159 + 0.10490990764546557j,
+                -0.03333405116621477 + 0.07743168760566253j,
+            ],
+            [
+                0.00632191135443812 + 0.035504099018565j,
+                -0.015941075214229425 + 0.08225639736907238j,
+                0.0006583927877445413 + 0.039635210213737254j,
+            ],
+        ]
+    )
+    assert np.allclose(I_kernel[[10, 55, 100]], I_reference, rtol=1e-10, atol=0), (
+        "Kernel evaluation should match the reference values."
+    )
+
+    config = asn.io_utils.ConfigData(
+        b=b, T=300.0, L=1.0, rho=1.225, obs=np.zeros((1, 3)), U0=U, data_type="dns"
+    )
+    model = asn.amiet_model.AmietModel(SimpleNamespace(config=config))
+    f = omega_vals / 2 / np.pi
+    assert model.frequency_kernel(f) is model.frequency_kernel(f.copy()), (
+        "The kernel should be reused for the same frequencies and flow."
+    )
+    assert model.frequency_kernel(f) is not model.frequency_kernel(2 * f), (
+        "The kernel should be rebuilt when the frequencies change."
+    )
+    print("[bold green]Frequency kernel test passed![/bold green]")
+
+
+def test_fused_radiation_integral():
+    ri = asn.radiation_integral
+    omega_vals = np.linspace(0, 2 * np.pi * 20_000, 257)
+    c0 = 343.0
+    theta = np.linspace(0.05, 2 * np.pi, 36, endpoint=False)  # not upstream
+    x1, S0 = 1.2 * np.cos(theta), np.full(theta.shape, 1.2)
+
+    for fresnel_tol in (None, 1e-10):
+        kernel = ri.compute_frequency_kernel(
+            omega_vals, 16.0, c0, 16.0 / c0, 0.0678, alpha=0.7, fresnel_tol=fresnel_tol
+        )
+        I_ref = ri.evaluate_radiation_integral(kernel, x1, S0, fused=False)
+        I = ri.evaluate_radiation_integral(kernel, x1, S0)
+        assert np.allclose(I, I_ref, rtol=1e-10, atol=0), "Fused should match"
+
+        # Blocks smaller than a row of observers, in a reused workspace
+        workspace = ri.RadiationWorkspace(block_size=16)
+        for _ in range(2):
+            I_small = ri.evaluate_radiation_integral(kernel, x1, S0, workspace)
+            assert np.array_equal(I_small, I), "Blocking should not change I"
+    assert workspace.nbytes == 16 * (6 * 8 + 5 * 16 + 1)
+
+    # The working memory does not grow with the number of observers
+    x1, S0 = np.tile(x1, 20), np.tile(S0, 20)
+    for fused in (True, False):
+        with asn.profiling.profile(trace_memory=True) as profiler:
+            I = ri.evaluate_radiation_integral(kernel, x1, S0, fused=fused)
+        extra = profiler.stages["evaluate_radiation_integral"].peak_memory - I.nbytes
+        profiler.reset()
+        if fused:
+            assert extra < 2**20 < I.nbytes, "Only block-sized temporaries"
+        else:
+            assert extra > 5 * I.nbytes
+    print("[bold green]Fused radiation integral test passed![/bold green]")
+
+
+def test_parametric_sweep(dns_case):
+    input_data = asn.io_utils.InputData(dns_case(nperseg=512))
+    model = asn.amiet_model.AmietModel(input_data)
+
+    result = asn.sweep.parametric_sweep(model, U0=[16.0, 25.0], alpha=[0.6, 0.7])
+    assert result.dims == ("U0", "alpha", "freq", "obs")
+    assert result.psd.shape[:2] == (2, 2)
+
+    # A sweep point should match a full reload of the data with that flow
+    for U0, alpha in [(16.0, 0.7), (25.0, 0.6)]:
+        reloaded = asn.io_utils.InputData(dns_case(nperseg=512, U0=U0, alpha=alpha))
+        f, psd = asn.amiet_model.AmietModel(reloaded).compute_psd()
+        f_sweep, psd_sweep = result.sel(U0=U0, alpha=alpha)
+        assert np.allclose(f_sweep, f), "Rescaled frequencies should match"
+        assert np.allclose(psd_sweep, psd, rtol=1e-8), "Sweep PSD should match"
+
+    parallel = asn.sweep.parametric_sweep(
+        model, n_workers=2, U0=[16.0, 25.0], alpha=[0.6, 0.7]
+    )
+    assert np.array_equal(parallel.psd, result.psd), "Workers should not change PSD"
+
+    # Points differing by L or rho share a transfer; more workers than points
+    shared = asn.sweep.parametric_sweep(
+        model, n_workers=8, U0=[16.0, 25.0], L=[0.5, 1.0], rho=[1.2, 1.3]
+    )
+    for U0, L, rho in [(16.0, 1.0, 1.3), (25.0, 0.5, 1.2)]:
+        config = replace(input_data.config, U0=U0, L=L, rho=rho)
+        f_sweep, psd_sweep = shared.sel(U0=U0, L=L, rho=rho)
+        f_point, phi_pp, ly = asn.sweep._rescale_statistics(
+            *model.statistics(), input_data.config, config
+        )
+        psd = asn.amiet_model.far_field_psd(f_point, phi_pp, ly, config.obs, config)
+        assert np.array_equal(f_sweep, f_point) and np.array_equal(psd_sweep, psd)
+    print("[bold green]Parametric sweep test passed![/bold green]")
+
+
+def test_spectra_cache(dns_case, tmp_path):
+    config_path = dns_case(nperseg=512, cache=True)
+    model = asn.amiet_model.AmietModel(asn.io_utils.InputData(config_path))
+    f, phi_pp = model.compute_wps()
+    _, ly = model.compute_coherence()
+    assert model.cache.misses == 1 and len(model.cache.entries()) == 1
+
+    # A new run on the same data should read the spectra from the cache
+    cached = asn.amiet_model.AmietModel(asn.io_utils.InputData(config_path))
+    assert np.array_equal(cached.compute_wps()[1], phi_pp), "Cached PSD differs"
+    assert np.array_equal(cached.compute_coherence()[1], ly), "Cached ly differs"
+    assert cached.cache.hits == 1, "The spectra should come from the cache"
+
+    # Changing the spectral parameters or the data should not reuse the entry
+    other = asn.io_utils.InputData(dns_case(nperseg=256, cache=True))
+    asn.amiet_model.AmietModel(other).compute_spectra()
+    changed = asn.io_utils.InputData(dns_case(nperseg=512, seed=1, cache=True))
+    model = asn.amiet_model.AmietModel(changed)
+    assert not np.array_equal(model.compute_wps()[1], phi_pp), "Stale cache entry"
+    assert model.cache.hits == 0
+
+    # Least recently used entries are evicted beyond the maximum size
+    cache = asn.cache.SpectraCache(str(tmp_path / "small"), max_size=1)
+    for i in range(3):
+        cache.store(f"key{i}", model.spectra)
+    assert [osp.basename(p) for p, _, _ in cache.entries()] == ["key2.h5"]
+    assert cache.load("key0") is None and cache.load("key2") is not None
+
+    # One reference per sensor, beyond the 64 kB of an HDF5 attribute
+    n_sensors = 20_000
+    many = asn.preproc.CrossSpectra(
+        f=np.arange(3.0),
+        auto=np.ones((n_sensors, 3)),
+        cross=np.ones((n_sensors, 3), dtype=complex),
+        ref_index=np.arange(n_sensors) // 100 * 100 + 50,
+        n_segments=4,
+    )
+    cache = asn.cache.SpectraCache(str(tmp_path / "many"))
+    cache.store("many", many)
+    assert np.array_equal(cache.load("many").ref_index, many.ref_index)
+
+    # Entries written with the reference as an attribute are still read
+    with h5py.File(osp.join(cache.directory, "many.h5"), "r+") as f:
+        del f["ref_index"]
+        f.attrs["ref_index"] = 7
+    assert cache.load("many").ref_index == 7
+    print("[bold green]Spectra cache test passed![/bold green]")
+
+
+def test_add_observers(dns_case):
+    config_path = dns_case(nperseg=512)
+    model = asn.amiet_model.AmietModel(asn.io_utils.InputData(config_path))
+    f, psd = model.compute_psd()
+    kernel = model.kernel
+
+    new_obs = np.array([[0.5, 0.0, 1.0], [-0.5, 0.3, 2.0], [0.0, 0.0, 3.0]])
+    with asn.profiling.profile() as profiler:
+        f_new, psd_all = model.add_observers(new_obs)
+    stages = profiler.stages
+    assert "AmietModel.compute_spectra" not in stages, "Spectra should be reused"
+    assert stages["evaluate_radiation_integral"].output_bytes == (
+        f.size * new_obs.shape[0] * 16
+    ), "Only the new observers should be evaluated"
+    assert model.kernel is kernel, "The frequency kernel should be reused"
+    profiler.reset()
+
+    assert psd_all.shape == (f.size, 5) and model.input_data.config.n_obs == 5
+    assert np.array_equal(psd_all[:, :2], psd), "Existing columns should be kept"
+    reference = asn.amiet_model.AmietModel(asn.io_utils.InputData(config_path))
+    reference.input_data.config.obs = model.input_data.config.obs
+    assert np.allclose(reference.compute_psd()[1], psd_all, rtol=1e-12)
+    assert model.radiation.shape == psd_all.shape
+    assert np.allclose(model.radiation, reference.radiation, rtol=1e-12)
+
+    _, psd_at = model.evaluate_at(new_obs[1:])
+    assert np.allclose(psd_at, psd_all[:, 3:], rtol=1e-12)
+    print("[bold green]Add observers test passed![/bold green]")
+
+
+def test_band_limited_psd(dns_case):
+    model = asn.amiet_model.AmietModel(
+        asn.io_utils.InputData(dns_case(nt=16384, nperseg=2048))
+    )
+    obs = np.array([[0.0, 0.0, 1.21], [1.0, 0.0, 0.5], [-1.0, 0.5, 0.8]])
+    f, psd = model.evaluate_at(obs)
+    df = f[1] - f[0]
+
+    # Narrowband, restricted to a band
+    f_band, psd_band = model.evaluate_at(obs, f_band=(100.0, 5000.0))
+    in_band = (f >= 100.0) & (f <= 5000.0)
+    assert np.array_equal(f_band, f[in_band])
+    assert np.array_equal(psd_band, psd[in_band])
+
+    # Radiation integral on a coarse grid, interpolated onto the bins
+    with asn.profiling.profile() as profiler:
+        f_grid, psd_grid = model.evaluate_at(
+            obs, f_band=(100.0, 5000.0), n_points=100
+        )
+    n_evaluated = profiler.stages["evaluate_radiation_integral"].output_bytes / 16
+    profiler.reset()
+    assert np.array_equal(f_grid, f_band)
+    assert n_evaluated < f_band.size * obs.shape[0] / 3, "Too many evaluations"
+    assert np.allclose(psd_grid, psd_band, rtol=1e-2, atol=0)
+
+    # Third-octave bands: the narrowband PSD summed over each band
+    center, lower, upper = asn.preproc.fractional_octave_bands(100.0, 5000.0)
+    assert np.isclose(center, 1000.0).any() and np.allclose(upper[:-1], lower[1:])
+    f_c, power = model.compute_band_psd(f_band=(100.0, 5000.0), obs=obs)
+    assert np.allclose(f_c, center)
+    for k in range(len(center)):
+        bins = (f >= lower[k]) & (f < upper[k])
+        assert np.allclose(power[k], psd[bins].sum(axis=0) * df, rtol=1e-2)
+
+    # Bands narrower than the resolution are dropped, settings are kept
+    f_c, _ = model.compute_band_psd(fraction=1)
+    assert f_c[0] * (10**0.15 - 10**-0.15) >= df
+    f_psd, _ = model.compute_psd(f_band=(100.0, 5000.0), n_points=50)
+    f_new, psd_all = model.add_observers(obs[1])
+    assert np.array_equal(f_new, f_psd) and psd_all.shape == (f_psd.size, 3)
+
+    # |I|^2 is kept on the same frequencies, interpolated like the PSD
+    I = model.compute_radiation_integral(f_psd, model.input_data.config.obs)
+    assert model.radiation.shape == psd_all.shape
+    assert np.allclose(model.radiation, np.abs(I) ** 2, rtol=5e-2)  # 50 points
+    print("[bold green]Band-limited PSD test passed![/bold green]")
+
+
+def test_single_precision(dns_case):
+    reference = asn.amiet_model.AmietModel(
+        asn.io_utils.InputData(dns_case(nperseg=512))
+    )
+    f, psd = reference.compute_psd()
+    _, phi_pp, ly = reference.statistics()
+
+    for mode in [{}, {"streaming": True}, {"lazy": True}]:
+        input_data = asn.io_utils.InputData(
+            dns_case(nperseg=512, precision="single", **mode)
+        )
+        block = next(input_data.iter_pressure(1000))
+        assert block.dtype == np.float32, "The pressure should stay in float32"
+        model = asn.amiet_model.AmietModel(input_data)
+        f_single, psd_single = model.compute_psd()
+        _, phi_single, ly_single = model.statistics()
+        assert model.spectra.auto.dtype == np.float64, "Averages are in float64"
+        assert np.array_equal(f_single, f)
+        assert np.allclose(phi_single, phi_pp, rtol=1e-6, atol=0)
+        assert np.allclose(ly_single, ly, rtol=1e-6, atol=0)
+        assert np.allclose(psd_single, psd, rtol=1e-6, atol=0)
+
+    spectra = asn.preproc.cross_spectra(
+        block.astype(np.float64), nperseg=256, dtype=np.float32
+    )
+    assert spectra.cross.dtype == np.complex128
+    try:
+        asn.io_utils.InputData(dns_case(precision="half"))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("An unknown precision should raise a ValueError")
+    print("[bold green]Single precision test passed![/bold green]")
+
+
+def test_pairwise_coherence(dns_case):
+    reference = asn.amiet_model.AmietModel(
+        asn.io_utils.InputData(dns_case(nt=16384, nperseg=512))
+    )
+    f, ly_reference = reference.compute_coherence()
+
+    config_path = dns_case(nt=16384, nperseg=512, coherence_method="pairs", cache=True)
+    model = asn.amiet_model.AmietModel(asn.io_utils.InputData(config_path))
+    f_pairs, ly_pairs = model.compute_coherence()
+    assert np.array_equal(f_pairs, f)
+    n_sensors = model.input_data.pos.shape[0]
+    assert model.spectra.matrix.shape == (n_sensors, n_sensors, f.size)
+    assert np.allclose(model.spectra.cross, reference.spectra.cross)
+    # Uniform coherence in the synthetic case: both estimate the same length
+    assert np.isclose(ly_pairs[1:].mean(), ly_reference[1:].mean(), rtol=1e-2)
+    assert np.std(ly_pairs[1:]) < np.std(ly_reference[1:]), "Pairs should be smoother"
+
+    # The matrix is cached with the spectra, apart from the reference spectra
+    cached = asn.amiet_model.AmietModel(asn.io_utils.InputData(config_path))
+    assert np.array_equal(cached.compute_coherence()[1], ly_pairs)
+    assert cached.cache.hits == 1 and cached.spectra.matrix is not None
+    try:
+        asn.io_utils.InputData(dns_case(coherence_method="all"))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("An unknown coherence method should raise a ValueError")
+    print("[bold green]Pairwise coherence test passed![/bold green]")
+
+
+def test_chord_stations(dns_case, tmp_path):
+    def load(**config):
+        # Pressure levels growing along the chord, coherence unchanged
+        config_path = dns_case(nperseg=512, **config)
+        with h5py.File(str(tmp_path / "pressure.h5"), "r+") as f:
+            f["pressure"][...] = f["pressure"][...] * np.arange(1, 5)[:, None]
+        return asn.amiet_model.AmietModel(asn.io_utils.InputData(config_path))
+
+    model = load(xprobes=[3, 0, 2])
+    x, f, phi_pp, ly = model.station_statistics()
+    assert phi_pp.shape == ly.shape == (3, f.size)
+    assert np.all(np.diff(x) > 0), "Stations should be sorted along the chord"
+    for k, index in enumerate([0, 2, 3]):
+        single = load(xprobes=index)
+        _, phi_single = single.compute_wps()
+        _, ly_single = single.compute_coherence()
+        assert np.allclose(phi_pp[k], phi_single), "Station spectra should match"
+        assert np.allclose(ly[k], ly_single), "Station coherence should match"
+
+    assert np.allclose(model.compute_wps()[1], phi_pp.mean(axis=0))
+    nearest = load(xprobes=[3, 0, 2], station_mode="nearest")
+    assert np.allclose(nearest.compute_wps()[1], phi_pp[-1])
+    assert np.allclose(nearest.compute_coherence()[1], ly[-1])
+
+    # Extrapolated to the trailing edge, here beyond the last station
+    x_te = 0.75  # in the units of the mesh
+    extrapolated = load(xprobes=[3, 0, 2], station_mode="extrapolate", x_te=x_te)
+    slope, intercept = np.polyfit(x, np.log(phi_pp[:, 1:]), 1)
+    x_te *= 2 * extrapolated.input_data.config.b
+    expected = np.exp(slope * x_te + intercept)
+    assert np.allclose(extrapolated.compute_wps()[1][1:], expected)
+    assert np.all(extrapolated.compute_wps()[1][1:] > phi_pp[-1, 1:])
+
+    # The cache keeps the statistics of every station, whatever the mode
+    cached = load(xprobes=[3, 0, 2], station_mode="nearest", cache=True)
+    cached.compute_spectra()
+    config = replace(cached.input_data.config, station_mode="average")
+    cached = asn.amiet_model.AmietModel(asn.io_utils.InputData(config))
+    cached.compute_spectra()
+    assert cached.cache.hits == 1, "The mode should not change the spectra"
+    (path, _, _), *_ = cached.cache.entries()
+    with h5py.File(path, "r") as f:
+        assert np.allclose(f["phi_pp"][:], phi_pp) and np.allclose(f["ly"][:], ly)
+        assert np.allclose(f["station_x"][:], x)
+    print("[bold green]Chord stations test passed![/bold green]")
+
+
+def test_online_estimator(dns_case):
+    config_path = dns_case(nt=16384, nperseg=512)
+    reference = asn.amiet_model.AmietModel(asn.io_utils.InputData(config_path))
+    f, psd = reference.compute_psd()
+
+    # The pressure arrives in blocks unrelated to the Welch segments
+    input_data = asn.io_utils.InputData(config_path)
+    model = asn.amiet_model.AmietModel(asn.io_utils.InputData(config_path))
+    online = asn.online.OnlineEstimator(model)
+    changes = []
+    for f_online, psd_online in online.feed(input_data.iter_pressure(1000), every=8):
+        assert np.array_equal(f_online, f) and psd_online.shape == psd.shape
+        center, change = online.convergence()
+        changes.append(change)
+    assert online.n_segments == reference.spectra.n_segments
+    assert np.allclose(online.psd()[1], psd, rtol=1e-10), "Final PSD should match"
+    assert np.array_equal(model.statistics()[0], f), "The model should follow"
+
+    # Band levels against the estimate at half the segments
+    n_segments = [n for n, _ in online.history]
+    assert np.all(np.diff(n_segments) >= 8) and len(n_segments) >= 6
+    assert np.all(np.isinf(changes[0])) and np.all(np.isfinite(changes[-1]))
+    first = next(k for k, change in enumerate(changes) if np.isfinite(change).all())
+    assert np.median(changes[-1]) < np.median(changes[first]), "Should converge"
+    online.convergence()
+    _, power = model.compute_band_psd(points_per_band=None)
+    assert np.allclose(online.history[-1][1], power), "Band power should match"
+    print("[bold green]Online estimator test passed![/bold green]")
+
+
+def test_watch(dns_case, tmp_path):
+    config_path = dns_case(nt=8192, nperseg=512)
+    reference = asn.amiet_model.AmietModel(asn.io_utils.InputData(config_path))
+    f, psd = reference.compute_psd()
+    with h5py.File(reference.input_data.config.data_path, "r") as f_h5:
+        pressure = f_h5["pressure"][:]
+
+    # The solver writes uneven slabs while the directory is watched
+    slab_dir = tmp_path / "slabs"
+    slab_dir.mkdir()
+    config_path = dns_case(nt=8192, nperseg=512, data_path=str(slab_dir / "p_*.h5"))
+    bounds = [(0, 1500), (1500, 2000), (2000, 5000), (5000, 8192), (7000, 8192)]
+
+    async def solver():
+        for k, (start, stop) in enumerate(bounds):
+            await asyncio.sleep(0.1)
+            with h5py.File(slab_dir / f"p_{k}.h5", "w") as f_h5:
+                f_h5.create_dataset("pressure", data=pressure[start:stop])
+            if k == 1:
+                await asyncio.sleep(0.15)  # incomplete slab, read again later
+            with h5py.File(slab_dir / f"p_{k}.h5", "a") as f_h5:
+                f_h5.create_dataset("T_s", data=0.01)
+                f_h5.create_dataset("time", data=0.01 * np.arange(start, stop))
+
+    async def run():
+        watcher = asn.watch.watch(
+            config_path,
+            out_dir=str(tmp_path / "out"),
+            interval=0.02,
+            max_pending=1,
+            idle_timeout=0.5,
+            plot=True,
+            console=console,
+        )
+        online, _ = await asyncio.gather(watcher, solver())
+        return online
+
+    console = Console(record=True, width=120)
+    online = asyncio.run(run())
+    assert online.n_segments == reference.spectra.n_segments
+    assert np.allclose(online.psd()[1], psd, rtol=1e-10), "Final PSD should match"
+    output = console.export_text()
+    assert "Skipping" in output, "The overlapping slab is skipped"
+    assert "Cannot read" in output and "p_1.h5" in output, "p_1 is read again"
+    with h5py.File(tmp_path / "out" / asn.watch.RESULTS_NAME, "r") as f_h5:
+        assert np.allclose(f_h5["psd"][:], psd, rtol=1e-10)
+    assert osp.exists(tmp_path / "out" / asn.watch.PLOT_NAME)
+    print("[bold green]Watch test passed![/bold green]")
+
+
+def test_profiling(dns_case):
+    profiler = asn.profiling.profiler
+    with asn.profiling.profile(trace_memory=True):
+        input_data = asn.io_utils.InputData(dns_case(nperseg=512))
+        model = asn.amiet_model.AmietModel(input_data)
+        f, psd = model.compute_psd()
+    stages = profiler.stages
+
+    for name in [
+        "InputData._read_data",
+        "AmietModel.compute_psd",
+        "AmietModel.compute_wps",
+        "AmietModel.compute_coherence",
+        "AmietModel.compute_spectra",
+        "evaluate_radiation_integral",
+    ]:
+        assert name in stages, f"Stage {name} should be recorded"
+    assert stages["InputData._read_data"].bytes_read >= input_data.pressure.nbytes
+    assert stages["AmietModel.compute_psd"].output_bytes == f.nbytes + psd.nbytes
+    assert stages["AmietModel.compute_spectra"].peak_memory > 0
+    assert stages["AmietModel.compute_psd"].duration >= max(
+        stages["AmietModel.compute_wps"].duration,
+        stages["AmietModel.compute_coherence"].duration,
+    ), "Nested stages should not last longer than the enclosing one"
+
+    # The report is shown by print_summary, and nothing is recorded afterwards
+    console = Console(record=True, width=120)
+    input_data.print_summary(console=console)
+    assert "AmietModel.compute_psd" in console.export_text()
+    report = profiler.report()
+    model.compute_psd()
+    assert profiler.report() == report, "A disabled profiler should not record"
+    profiler.reset()
+    print("[bold green]Profiling test passed![/bold green]")
+
+
+def test_batch_runner(dns_case, tmp_path):
+    configs = []
+    for i in range(3):
+        case_dir = tmp_path / f"case{i}"
+        case_dir.mkdir()
+        configs.append(dns_case(case_dir, seed=i, nperseg=512, U0=16.0 + i))
+    # Missing data, malformed YAML and an unknown configuration key
+    for name in ("broken_data", "broken_yaml", "broken_key"):
+        (tmp_path / name).mkdir()
+    dns_case(tmp_path / "broken_data", data_path=str(tmp_path / "missing.h5"))
+    (tmp_path / "broken_yaml" / "config.yaml").write_text("b: [0.1\nU0: 16\n")
+    dns_case(tmp_path / "broken_key", nperseg=512, unknown_option=1)
+
+    out_dir = str(tmp_path / "batch")
+    pattern = str(tmp_path / "*" / "config.yaml")
+    index = asn.batch.run_batch(pattern, out_dir, n_workers=2)
+    cases = index["cases"]
+    assert len(cases) == 6
+    failed = [case for case, entry in cases.items() if entry["status"] == "failed"]
+    assert len(failed) == 3 and all(case.startswith("broken") for case in failed)
+    assert all(
+        entry["status"] == "done" for case, entry in cases.items() if case not in failed
+    ), "The broken cases should not stop the others"
+
+    # The results match a direct run of the model
+    case = asn.batch.case_name(configs[1])
+    model = asn.amiet_model.AmietModel(asn.io_utils.InputData(configs[1]))
+    f, psd = model.compute_psd()
+    with h5py.File(osp.join(out_dir, cases[case]["result"]), "r") as h5:
+        assert np.allclose(h5["psd"][:], psd) and np.allclose(h5["f"][:], f)
+
+    # After a crash, only the unfinished cases are run again
+    result_path = osp.join(out_dir, cases[case]["result"])
+    os.remove(result_path)
+    mtimes = {
+        c: os.stat(osp.join(out_dir, e["result"])).st_mtime_ns
+        for c, e in cases.items()
+        if e["status"] == "done" and c != case
+    }
+    index = asn.batch.run_batch(configs, out_dir, n_workers=1, memory_limit=1)
+    assert index["cases"][case]["status"] == "done" and osp.exists(result_path)
+    for c, mtime in mtimes.items():
+        path = osp.join(out_dir, index["cases"][c]["result"])
+        assert os.stat(path).st_mtime_ns == mtime, "Finished cases should be skipped"
+    print("[bold green]Batch runner test passed![/bold green]")
+
+
 if __name__ == "__main__":
     test_radiation_integral()
     test_amiet_model()
@@ -7,6 +7,8 @@ import numpy as np
 from rich import print
 
 import amiet_self_noise.io_utils as io
+import amiet_self_noise as asn
+import amiet_self_noise.amiet_model as amiet_model
 
 
 def test_read_pressure_data():
@@ -82,6 +84,214 @@ def test_input_data_dns():
     input_data.print_summary()
 
 
+def test_input_data_streaming(dns_case):
+    in_memory = io.InputData(dns_case(nperseg=512))
+    streamed = io.InputData(dns_case(nperseg=512, streaming=True))
+
+    assert streamed.pressure is None, "Streaming mode should not load the pressure"
+    assert streamed.n_time_steps == in_memory.n_time_steps
+    blocks = list(streamed.iter_pressure(1000))
+    assert all(block.shape[1] <= 1000 for block in blocks)
+    assert np.allclose(np.concatenate(blocks, axis=1), in_memory.pressure), (
+        "Streamed blocks should reproduce the de-normalized pressure."
+    )
+
+    f, phi_pp = amiet_model.AmietModel(in_memory).compute_wps()
+    f_s, phi_pp_s = amiet_model.AmietModel(streamed).compute_wps()
+    _, ly = amiet_model.AmietModel(in_memory).compute_coherence()
+    _, ly_s = amiet_model.AmietModel(streamed).compute_coherence()
+
+    assert np.array_equal(f, f_s)
+    assert np.allclose(phi_pp, phi_pp_s), "Streaming WPS should match in-memory WPS"
+    assert np.allclose(ly, ly_s), "Streaming coherence should match in-memory one"
+    print("[bold green]Streaming test passed![/bold green]")
+
+
+def test_input_data_lazy(dns_case):
+    eager = io.InputData(dns_case())
+    for contiguous in (False, True):
+        lazy = io.InputData(dns_case(lazy=True, contiguous=contiguous))
+
+        assert lazy._pos is None, "The mesh should not be read at construction"
+        assert isinstance(lazy.pressure, io.PressureView)
+        assert (lazy.pressure._memmap is not None) == contiguous
+        assert lazy.pressure.shape == eager.pressure.shape
+        assert np.allclose(lazy.pressure[:, 100:300], eager.pressure[:, 100:300]), (
+            "Lazy pressure should be de-normalized on access."
+        )
+        assert np.allclose(lazy.pressure[2, 7], eager.pressure[2, 7])
+        assert np.allclose(np.asarray(lazy.pressure), eager.pressure)
+        assert np.allclose(lazy.pos, eager.pos), "Lazy positions should match"
+
+        f, phi_pp = amiet_model.AmietModel(eager).compute_wps()
+        _, phi_pp_lazy = amiet_model.AmietModel(lazy).compute_wps()
+        assert np.allclose(phi_pp, phi_pp_lazy), "Lazy WPS should match eager WPS"
+    print("[bold green]Lazy loading test passed![/bold green]")
+
+
+def test_probe_selection(dns_case, tmp_path):
+    assert np.array_equal(io.probe_indices(None, 4), [0, 1, 2, 3])
+    assert np.array_equal(io.probe_indices(-1, 4), [3])
+    assert np.array_equal(io.probe_indices("1:", 4), [1, 2, 3])
+    assert np.array_equal(io.probe_indices(range(0, 4, 2), 4), [0, 2])
+    assert np.array_equal(io.probe_indices([3, 0], 4), [3, 0])
+    assert np.array_equal(io.probe_indices([True, False, False, True], 4), [0, 3])
+    invalid = [(4, IndexError), ([True], ValueError), ("a:b", ValueError)]
+    invalid += [(empty, ValueError) for empty in ("1:1", [], np.zeros(4, bool))]
+    for selection, error in invalid:
+        try:
+            io.probe_indices(selection, 4)
+        except error:
+            pass
+        else:
+            raise AssertionError(f"{selection!r} should raise {error.__name__}")
+
+    # Lists, masks and ranges select the outer product of the two directions
+    mask = np.zeros(12, dtype=bool)
+    mask[[1, 5, 6, 11]] = True
+    config_path = dns_case(xprobes=[3, 0], yprobes=mask.tolist())
+    with h5py.File(str(tmp_path / "pressure.h5"), "r") as f:
+        expected = f["pressure"][:][:, [3, 0]][:, :, mask].reshape(4096, -1).T
+    with h5py.File(str(tmp_path / "grid.h5"), "r") as f:
+        z = f["z"][:][[3, 0]][:, mask].ravel()
+    p_dyn = io.read_config(config_path).p_dyn
+    for options in [{}, {"lazy": True}, {"lazy": True, "contiguous": True}]:
+        input_data = io.InputData(
+            dns_case(xprobes=[3, 0], yprobes="1:12:5", **options)
+        )
+        expected_range = expected[[0, 2, 3, 4, 6, 7]]  # y = 1, 6, 11 of both x
+        assert np.allclose(input_data.pressure[:, :], expected_range * p_dyn)
+        input_data = io.InputData(
+            dns_case(xprobes=[3, 0], yprobes=mask.tolist(), **options)
+        )
+        assert input_data.pos.shape == (8, 3)
+        assert np.allclose(input_data.pos[:, 2], z * 2 * input_data.config.b)
+        assert np.allclose(input_data.pressure[:, :], expected * p_dyn)
+        assert np.allclose(input_data.pressure[:, -1], expected[:, -1] * p_dyn)
+    streamed = io.InputData(
+        dns_case(xprobes=[3, 0], yprobes=mask.tolist(), streaming=True)
+    )
+    blocks = np.concatenate(list(streamed.iter_pressure(1000)), axis=1)
+    assert np.allclose(blocks, expected * p_dyn)
+
+    # Only the chunks holding selected probes are read
+    path = str(tmp_path / "chunked.h5")
+    data = np.random.default_rng(0).normal(size=(64, 8, 12))
+    with h5py.File(path, "w") as f:
+        f.create_dataset("p", data=data, chunks=(64, 2, 4))
+    with h5py.File(path, "r") as f, asn.profiling.profile() as profiler:
+        with asn.profiling.stage("read"):
+            x_idx, y_idx = np.array([6, 0]), np.array([10, 1])
+            p = io.read_probes(f["p"], x_idx, y_idx, time_key=slice(8, 40))
+    assert np.array_equal(p, data[8:40][:, [6, 0]][:, :, [10, 1]].reshape(32, 4))
+    assert profiler.stages["read"].bytes_read == p.nbytes, "Only 4 probes to read"
+    print("[bold green]Probe selection test passed![/bold green]")
+
+
+def test_multi_file_input(dns_case, tmp_path):
+    single = io.InputData(dns_case(nperseg=512))
+    with h5py.File(single.config.data_path, "r") as f:
+        pressure = f["pressure"][:]
+
+    def write_slabs(directory, bounds, time=True):
+        os.makedirs(directory, exist_ok=True)
+        for start, stop in bounds:
+            with h5py.File(os.path.join(directory, f"p_{start}.h5"), "w") as f:
+                f.create_dataset("pressure", data=pressure[start:stop], chunks=True)
+                f.create_dataset("T_s", data=0.01)
+                if time:
+                    f.create_dataset("time", data=0.01 * np.arange(start, stop))
+        return os.path.join(directory, "p_*.h5")
+
+    # Uneven slabs, listed out of order: "p_1000" sorts before "p_300" as text
+    bounds = [(0, 300), (300, 1000), (1000, 2500), (2500, 4096)]
+    for time in (True, False):
+        pattern = write_slabs(str(tmp_path / f"slabs_{time}"), bounds, time=time)
+        slabs = io.PressureSlabs(pattern, n_workers=3)
+        assert [os.path.basename(path) for path in slabs.paths] == [
+            "p_0.h5",
+            "p_300.h5",
+            "p_1000.h5",
+            "p_2500.h5",
+        ]
+        assert np.array_equal(slabs.offsets, [0, 300, 1000, 2500, 4096])
+
+        stitched = io.InputData(dns_case(nperseg=512, data_path=pattern))
+        assert stitched.n_time_steps == 4096 and stitched.fs == single.fs
+        assert np.array_equal(stitched.pressure, single.pressure)
+        lazy = io.InputData(dns_case(nperseg=512, data_path=pattern, lazy=True))
+        window = (slice(None), slice(250, 1100, 3))
+        assert np.array_equal(lazy.pressure[window], single.pressure[window])
+        assert np.array_equal(lazy.pressure[:, 2500], single.pressure[:, 2500])
+
+    # Streaming reads blocks across the slab boundaries
+    streamed = io.InputData(dns_case(nperseg=512, data_path=pattern, streaming=True))
+    blocks = list(streamed.iter_pressure(700))
+    assert [block.shape[1] for block in blocks] == [700] * 5 + [596]
+    assert np.array_equal(np.concatenate(blocks, axis=1), single.pressure)
+    _, phi_pp = amiet_model.AmietModel(single).compute_wps()
+    _, phi_pp_s = amiet_model.AmietModel(streamed).compute_wps()
+    assert np.allclose(phi_pp, phi_pp_s), "Stitched WPS should match the single file"
+
+    # Gaps and overlaps between the slabs are detected
+    for name, bounds, message in [
+        ("gap", [(0, 1000), (1010, 4096)], "Gap of 10"),
+        ("overlap", [(0, 1000), (990, 4096)], "Overlap of 10"),
+    ]:
+        pattern = write_slabs(str(tmp_path / name), bounds)
+        try:
+            io.PressureSlabs(pattern)
+        except ValueError as error:
+            assert message in str(error), str(error)
+        else:
+            raise AssertionError(f"The {name} should be detected")
+    print("[bold green]Multi-file input test passed![/bold green]")
+
+
+def test_results_store(dns_case, tmp_path):
+    obs = np.random.default_rng(0).uniform(-2, 2, (40, 3)).tolist()
+    input_data = io.InputData(dns_case(nperseg=512, obs=obs))
+    model = amiet_model.AmietModel(input_data)
+    f, psd = model.compute_psd()
+    _, phi_pp = model.compute_wps()
+    _, ly = model.compute_coherence()
+    I = model.compute_radiation_integral(f, input_data.config.obs)
+    radiation = np.abs(I) ** 2
+    assert np.allclose(model.radiation, radiation, rtol=1e-12), (
+        "The radiation integral of the PSD should be kept"
+    )
+
+    path = str(tmp_path / "results.h5")
+    io.write_results(
+        path, f, psd, input_data.config, phi_pp=phi_pp, ly=ly, radiation=radiation
+    )
+    with h5py.File(path, "r") as h5:
+        assert h5["psd"].compression == "gzip" and h5["psd"].chunks is not None
+
+    results = io.read_results(path)
+    assert np.array_equal(results.psd, psd) and np.array_equal(results.f, f)
+    assert np.array_equal(results.radiation, radiation)
+    assert np.array_equal(results.obs, input_data.config.obs)
+    assert results.config.U0 == input_data.config.U0
+    assert results.config.c0 == input_data.config.c0
+
+    # Partial reads: a frequency band and a few observers, in any order
+    band = (f[10], f[20])
+    with asn.profiling.profile() as profiler:
+        with asn.profiling.stage("read"):
+            part = io.read_results(path, obs=[7, 2, 7], f_band=band)
+    assert np.array_equal(part.f, f[10:21])
+    assert np.array_equal(part.psd, psd[10:21][:, [7, 2, 7]])
+    assert np.array_equal(part.obs, input_data.config.obs[[7, 2, 7]])
+    assert np.array_equal(part.ly, ly[10:21])
+    assert profiler.stages["read"].bytes_read == 2 * part.psd[:, :2].nbytes, (
+        "Only the selection should be read, the repeated observer once"
+    )
+    single = io.read_results(path, obs=3)
+    assert np.array_equal(single.psd, psd[:, 3]) and single.obs.shape == (3,)
+    print("[bold green]Results store test passed![/bold green]")
+
+
 if __name__ == "__main__":
     # test_read_pressure_data()
     # test_read_config()
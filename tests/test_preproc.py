@@ -1,6 +1,7 @@
 import os.path as osp
 
 import numpy as np
+import scipy.signal as sg
 import matplotlib.pyplot as plt
 
 import amiet_self_noise.preproc as preproc
@@ -90,6 +91,110 @@ def test_coherence_length():
     print("[bold blue]Coherence length computation test passed![/bold blue]")
 
 
+def test_cross_spectra():
+    print("[bold blue]Testing single-pass cross-spectra...[/bold blue]")
+    # Generate synthetic, partially correlated pressure data
+    fs = 1000  # Sampling frequency
+    rng = np.random.default_rng(0)
+    common = rng.normal(0, 1, 4 * fs)
+    pressure = np.array([common + rng.normal(0, 0.5, 4 * fs) for _ in range(10)])
+    ref_index = pressure.shape[0] // 2
+    kwargs = dict(nperseg=500, noverlap=250, window="hann")
+
+    spectra = preproc.cross_spectra(pressure, ref_index=ref_index, fs=fs, **kwargs)
+    f, spp = sg.welch(pressure, fs=fs, **kwargs)
+    _, gamma = sg.coherence(pressure[ref_index], pressure, fs=fs, **kwargs)
+
+    assert np.allclose(spectra.f, f), "Frequencies should match scipy.signal.welch"
+    assert np.allclose(spectra.auto, spp), "Auto-spectra should match welch"
+    assert np.allclose(spectra.coherence, gamma), "Coherence should match scipy"
+
+    # Pushing the record in uneven blocks should give the same result
+    accumulator = preproc.WelchAccumulator(
+        pressure.shape[0], fs=fs, ref_index=ref_index, **kwargs
+    )
+    for block in np.array_split(pressure, 7, axis=1):
+        accumulator.update(block)
+    streamed = accumulator.result()
+
+    assert streamed.n_segments == spectra.n_segments, "Segment count should match"
+    assert np.allclose(streamed.auto, spectra.auto), "Block-wise auto-spectra differ"
+    assert np.allclose(streamed.cross, spectra.cross), "Block-wise cross-spectra differ"
+
+    # Cross-spectral matrix of all the pairs, and coherence by separation
+    full = preproc.cross_spectra(
+        pressure, ref_index=ref_index, fs=fs, cross_matrix=True, **kwargs
+    )
+    assert np.allclose(full.cross, spectra.cross), "Reference row should match"
+    assert np.allclose(full.matrix, np.conj(np.swapaxes(full.matrix, 0, 1)))
+    _, gamma_pair = sg.coherence(pressure[2], pressure[7], fs=fs, **kwargs)
+    assert np.allclose(full.coherence_matrix[2, 7], gamma_pair)
+
+    z = np.arange(10) * 0.01
+    eta, gamma_eta, n_pairs = preproc.separation_coherence(full, z)
+    assert np.allclose(eta, z) and np.array_equal(n_pairs, 10 - np.arange(10))
+    assert np.allclose(gamma_eta[0], 1.0), "A sensor is coherent with itself"
+    expected = np.mean([full.coherence_matrix[i, i + 3] for i in range(7)], axis=0)
+    assert np.allclose(gamma_eta[3], expected)
+    _, _, n_grouped = preproc.separation_coherence(full, z, groups=np.arange(10) % 2)
+    assert np.array_equal(n_grouped, [10, 8, 6, 4, 2])
+
+    print("[bold blue]Cross-spectra test passed![/bold blue]")
+
+
+def test_coherence_backends():
+    print("[bold blue]Testing parallel coherence backends...[/bold blue]")
+    fs = 1000  # Sampling frequency
+    rng = np.random.default_rng(1)
+    common = rng.normal(0, 1, 2 * fs)
+    pressure = np.array([common + rng.normal(0, 0.5, 2 * fs) for _ in range(11)])
+    kwargs = dict(
+        ref_index=5, fs=fs, filter=True, flims=(50, 300), order=2, nperseg=250
+    )
+
+    f, gamma = preproc.coherence_function(pressure, backend="serial", **kwargs)
+    for backend in ("thread", "process"):
+        f_b, gamma_b = preproc.coherence_function(
+            pressure, backend=backend, n_workers=3, **kwargs
+        )
+        assert np.array_equal(f, f_b), f"Frequencies differ for {backend} backend"
+        assert np.allclose(gamma, gamma_b), f"Coherence differs for {backend} backend"
+
+    assert gamma.shape == (pressure.shape[0], f.shape[0])
+    assert np.allclose(gamma[5], 1.0), "Reference coherence should be one"
+    print("[bold blue]Parallel coherence test passed![/bold blue]")
+
+
+def test_bandpass_filter():
+    print("[bold blue]Testing batched bandpass filtering...[/bold blue]")
+    fs = 1000  # Sampling frequency
+    rng = np.random.default_rng(2)
+    pressure = rng.normal(0, 1, (8, 4 * fs))
+
+    y, sos = preproc.bandpass_filter(pressure, (50, 300), fs, order=2)
+    y_again, sos_again = preproc.bandpass_filter(pressure, (50, 300), fs, order=2)
+    expected = np.array([sg.sosfilt(sos, p) for p in pressure])
+
+    assert sos_again is sos, "The filter design should be cached"
+    assert np.allclose(y, expected), "Batched filter should match per-sensor sosfilt"
+
+    y_zp, _ = preproc.bandpass_filter(pressure, (50, 300), fs, zero_phase=True)
+    assert np.allclose(y_zp, sg.sosfiltfilt(sos, pressure, axis=-1))
+
+    # The filtered spectrum is corrected for the filter gain inside the band
+    kwargs = dict(fs=fs, avg=0, nperseg=500)
+    f, spp = preproc.spectrum(pressure, **kwargs)
+    for zero_phase in (False, True):
+        _, spp_f = preproc.spectrum(
+            pressure, filter=True, flims=(50, 300), zero_phase=zero_phase, **kwargs
+        )
+        band = (f > 100) & (f < 250)
+        assert np.allclose(spp_f[band], spp[band], rtol=0.2), (
+            "Gain-corrected spectrum should match the unfiltered one in band"
+        )
+    print("[bold blue]Bandpass filter test passed![/bold blue]")
+
+
 if __name__ == "__main__":
     test_wps()
     test_coherence_length()